@@ -74,7 +74,10 @@ CREATE TABLE IF NOT EXISTS tasks (
     task_id TEXT PRIMARY KEY,
     task_type TEXT NOT NULL,
     status TEXT NOT NULL,
+    scope TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+-- what the task analysed, so results are only carried forward into a task of the same scope
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS scope TEXT;
 COMMIT;
\ No newline at end of file
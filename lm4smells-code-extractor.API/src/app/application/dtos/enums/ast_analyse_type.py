@@ -0,0 +1,10 @@
+from enum import Enum
+
+class ASTAnalyseType(str, Enum):
+    large_class = "large-class"
+    long_method = "long-method"
+    long_parameter_list = "long-parameter-list"
+    data_class = "data-class"
+    lazy_class = "lazy-class"
+    magic_numbers = "magic-numbers"
+    all = "all"     #every AST detector, only accepted by /api/schedule/ast
\ No newline at end of file
@@ -9,4 +9,30 @@ class MLModel(str, Enum):
     GAUSSIAN = "GAUSSIAN" #long parameter list
     QDA = "QDA"     #long parameter list
     IR = "IR"       #large class
+    all = "all"     #every model supported for the analyse type
 
+
+# models each analysis type can be classified with, and the setting holding the path of each one
+ML_MODEL_SETTINGS = {
+    "long-method": {
+        MLModel.LGBM: "lgbm_lm_model",
+        MLModel.KNN: "knn_lm_model",
+        MLModel.LDA: "lda_lm_model",
+        MLModel.RIDGE: "ridge_lm_model",
+        MLModel.SGD: "sgd_lm_model",
+    },
+    "long-parameter-list": {
+        MLModel.GAUSSIAN: "gaussian_lpl_model",
+        MLModel.KNN: "knn_lpl_model",
+        MLModel.LGBM: "lgbm_lpl_model",
+        MLModel.QDA: "qda_lpl_model",
+        MLModel.SGD: "sgd_lpl_model",
+    },
+    "large-class": {
+        MLModel.LGBM: "lgbm_lc_model",
+        MLModel.KNN: "knn_lc_model",
+        MLModel.LDA: "lda_lc_model",
+        MLModel.RIDGE: "ridge_lc_model",
+        MLModel.IR: "ir_lc_model",
+    },
+}
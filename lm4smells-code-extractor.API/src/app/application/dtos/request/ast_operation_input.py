@@ -1,14 +1,29 @@
-from typing import List
+from typing import List, Union, Optional
 from fastapi import UploadFile
+from application.dtos.request.uploaded_files import read_uploaded_files
+from application.dtos.request.carry_forward import CarryForward
+from application.dtos.enums.analyse_type import AnalyseType
+from application.dtos.enums.ast_analyse_type import ASTAnalyseType
 
 class ASTOperationInput:
-    def __init__(self, file_contents, file_names, extract_type, analyse_type, task_id):
+    # order in which the detectors run when every smell is requested
+    ALL_ANALYSE_TYPES = [
+        AnalyseType.long_parameter_list,
+        AnalyseType.long_method,
+        AnalyseType.large_class,
+        AnalyseType.data_class,
+        AnalyseType.lazy_class,
+        AnalyseType.magic_numbers,
+    ]
+
+    def __init__(self, file_contents, file_names, extract_type, analyse_type, task_id, carry_forward: Optional[CarryForward] = None):
         self.file_contents = file_contents
         self.file_names = file_names
         self.extract_type = extract_type
-        self.analyse_type = analyse_type
+        self.analyse_types = self.expand_analyse_types(analyse_type)
         #self.smell_definition = smell_definition
         self.task_id = task_id
+        self.carry_forward = carry_forward
     
     @classmethod
     async def process_files(
@@ -16,12 +31,12 @@ class ASTOperationInput:
         extract_type,
         analyse_type,
         #smell_definition,
-        files: List[UploadFile],
-        task_id
+        files: Optional[List[UploadFile]],
+        task_id,
+        session_id: Optional[str] = None,
+        previous_task_id: Optional[str] = None
     ):
-        raw_file_content = [await file.read() for file in files]
-        decoded_file_content = [content.decode("utf-8") for content in raw_file_content]
-        file_names = [file.filename for file in files]
+        decoded_file_content, file_names = await read_uploaded_files(files, session_id)
 
         return cls(
             file_contents=decoded_file_content,
@@ -29,5 +44,24 @@ class ASTOperationInput:
             extract_type=extract_type,
             analyse_type=analyse_type,
             #smell_definition=smell_definition,
-            task_id=task_id
-        )
\ No newline at end of file
+            task_id=task_id,
+            carry_forward=CarryForward.for_upload(previous_task_id, session_id, file_names)
+        )
+
+    @property
+    def analyse_type(self) -> AnalyseType:
+        return self.analyse_types[0]
+
+    @classmethod
+    def expand_analyse_types(cls, analyse_type: Union[ASTAnalyseType, List[ASTAnalyseType]]) -> List[AnalyseType]:
+        requested = analyse_type if isinstance(analyse_type, list) else [analyse_type]
+
+        analyse_types: List[AnalyseType] = []
+        for item in requested:
+            for expanded in (cls.ALL_ANALYSE_TYPES if item == ASTAnalyseType.all else [AnalyseType(item)]):
+                if expanded not in analyse_types:
+                    analyse_types.append(expanded)
+
+        if not analyse_types:
+            raise ValueError("At least one analysis type is required")
+        return analyse_types
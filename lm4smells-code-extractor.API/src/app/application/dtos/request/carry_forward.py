@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+from typing import List, Optional
+from infrastructure.service.storage.upload_store import upload_store
+
+
+@dataclass
+class CarryForward:
+    """Results of a previous task to copy into a new one, except for the files listed in ``skip_files``."""
+
+    previous_task_id: str
+    skip_files: List[str]   # analysed again in the new task, or deleted since the previous one
+
+    @classmethod
+    def for_upload(cls, previous_task_id: Optional[str], session_id: Optional[str], file_names: List[str]) -> Optional["CarryForward"]:
+        if not previous_task_id:
+            return None
+
+        deleted: List[str] = []
+        if session_id:
+            deleted = (upload_store.get_session(session_id).get("source") or {}).get("deleted", [])
+        return cls(previous_task_id=previous_task_id, skip_files=sorted(set(file_names) | set(deleted)))
@@ -1,11 +1,16 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 from fastapi import UploadFile
+from application.dtos.request.uploaded_files import read_uploaded_files
+from application.dtos.request.carry_forward import CarryForward
 from application.dtos.enums.dl_model import DLModel
 from application.dtos.enums.extract_type import ExtractType
 
 
 class DLOperationInput:
-    def __init__(self, file_contents: List[str], file_names: List[str], extract_type: ExtractType, analyse_type, dl_model: DLModel, task_id: str):
+    # map_metrics_to_dl_input only reads the raw and halstead families
+    metric_families = ("raw", "hal")
+
+    def __init__(self, file_contents: List[str], file_names: List[str], extract_type: ExtractType, analyse_type, dl_model: DLModel, task_id: str, carry_forward: Optional[CarryForward] = None):
         self.file_contents = file_contents
         self.file_names = file_names
         self.extract_type = extract_type
@@ -13,19 +18,20 @@ class DLOperationInput:
         self.dl_model = dl_model
         self.programming_language = ["python"] * len(file_names)
         self.task_id = task_id
+        self.carry_forward = carry_forward
 
     @classmethod
     async def process_files(
         cls,
-        files: List[UploadFile],
+        files: Optional[List[UploadFile]],
         extract_type: ExtractType,
         analyse_type,
         dl_model: DLModel,
-        task_id
+        task_id,
+        session_id: Optional[str] = None,
+        previous_task_id: Optional[str] = None
     ):
-        raw_file_content = [await file.read() for file in files]
-        decoded_file_content = [content.decode("utf-8") for content in raw_file_content]
-        file_names = [file.filename for file in files]
+        decoded_file_content, file_names = await read_uploaded_files(files, session_id)
 
         return cls(
             file_contents=decoded_file_content,
@@ -33,19 +39,24 @@ class DLOperationInput:
             extract_type=extract_type,
             analyse_type=analyse_type,
             dl_model=dl_model,
-            task_id=task_id
+            task_id=task_id,
+            carry_forward=CarryForward.for_upload(previous_task_id, session_id, file_names)
         )
 
     @property
-    def respective_codes(self) -> List[Dict[str, str]]:
-        return [
+    def respective_codes(self) -> Iterator[Dict[str, str]]:
+        return self.codes_of(range(len(self.file_names)))
+
+    def codes_of(self, indexes: Iterable[int]) -> Iterator[Dict[str, str]]:
+        # a generator, so session files are read one at a time while extracting
+        return (
             {
-                "file_name": fname,
-                "code": fcode,
-                "programming_language": planguage,
+                "file_name": self.file_names[i],
+                "code": self.file_contents[i],
+                "programming_language": self.programming_language[i],
             }
-            for fname, fcode, planguage in zip(self.file_names, self.file_contents, self.programming_language)
-        ]
+            for i in indexes
+        )
 
     @staticmethod
     def map_metrics_to_dl_input(extraction_results: List[Dict[str, Any]]) -> None:
@@ -1,5 +1,7 @@
-from typing import List
+from typing import List, Optional
 from fastapi import UploadFile
+from application.dtos.request.uploaded_files import read_uploaded_files
+from infrastructure.service.metric_codes.radon_analyzer import METRIC_FAMILIES
 
 class MessageOperationInput:
     def __init__(self, is_composite_prompt: bool, model: str, prompt: str, prompt_type: str, 
@@ -15,19 +17,24 @@ class MessageOperationInput:
         self.task_id = task_id
         self.programming_language = ["python"] * len(file_name)
 
+    @property
+    def metric_families(self):
+        # metrics are only embedded in composite prompts
+        return METRIC_FAMILIES if self.is_composite_prompt else ()
+
     @property
     def respective_codes(self):
-        return [{"file_name": fname, "code": fcode, "programming_language": planguage} 
-                for fname, fcode, planguage in zip(self.file_name, self.code, self.programming_language)]
+        # a generator, so session files are read one at a time while extracting
+        return ({"file_name": fname, "code": fcode, "programming_language": planguage}
+                for fname, fcode, planguage in zip(self.file_name, self.code, self.programming_language))
     
 
     @classmethod
     async def process_files(cls, is_composite_prompt: bool, model: str, prompt: str, prompt_type: str,
-                         analyse_type: int, extract_type: int, files: List[UploadFile], task_id: str):
+                         analyse_type: int, extract_type: int, files: Optional[List[UploadFile]], task_id: str,
+                         session_id: Optional[str] = None):
         
-        raw_file_content = [await file.read() for file in files]
-        decoded_file_content = [content.decode("utf-8") for content in raw_file_content]
-        file_names = [file.filename for file in files]
+        decoded_file_content, file_names = await read_uploaded_files(files, session_id)
 
         return cls(
             is_composite_prompt=is_composite_prompt,
@@ -1,51 +1,90 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Iterable, Iterator, Any, Optional, Union
 from fastapi import UploadFile
-from application.dtos.enums.ml_model import MLModel
+from application.dtos.request.uploaded_files import read_uploaded_files
+from application.dtos.request.carry_forward import CarryForward
+from application.dtos.enums.ml_model import ML_MODEL_SETTINGS, MLModel
 from application.dtos.enums.extract_type import ExtractType
 
 class MLOperationInput:
-    def __init__(self, file_contents: List[str], file_names: List[str], extract_type: ExtractType, analyse_type, ml_model: MLModel, task_id: str):
+    # map_metrics_to_ml_input only reads the raw and halstead families
+    metric_families = ("raw", "hal")
+
+    def __init__(self, file_contents: List[str], file_names: List[str], extract_type: ExtractType, analyse_type, ml_model: Union[MLModel, List[MLModel]], task_id: str, carry_forward: Optional[CarryForward] = None, ensemble: bool = False):
         self.file_contents = file_contents
         self.file_names = file_names
         self.extract_type = extract_type
         self.analyse_type = analyse_type
-        self.ml_model = ml_model
+        self.ml_models = self.expand_ml_models(ml_model, analyse_type)
+        self.ensemble = ensemble
         self.programming_language = ["python"] * len(file_names)
         self.task_id = task_id
+        self.carry_forward = carry_forward
 
 
     @classmethod
     async def process_files(
         cls,
-        files: List[UploadFile],
+        files: Optional[List[UploadFile]],
         extract_type: ExtractType,
         analyse_type,
-        ml_model: MLModel,
-        task_id
+        ml_model: Union[MLModel, List[MLModel]],
+        task_id,
+        session_id: Optional[str] = None,
+        previous_task_id: Optional[str] = None,
+        ensemble: bool = False
     ):
-        raw_file_content = [await file.read() for file in files]
-        decoded_file_content = [content.decode("utf-8") for content in raw_file_content]
-        file_names = [file.filename for file in files]
+        # a bad model is reported before the upload is read and decoded
+        ml_models = cls.expand_ml_models(ml_model, analyse_type)
+        decoded_file_content, file_names = await read_uploaded_files(files, session_id)
 
         return cls(
             file_contents=decoded_file_content,
             file_names=file_names,
             extract_type=extract_type,
             analyse_type=analyse_type,
-            ml_model=ml_model,
-            task_id=task_id
+            ml_model=ml_models,
+            task_id=task_id,
+            carry_forward=CarryForward.for_upload(previous_task_id, session_id, file_names),
+            ensemble=ensemble
         )
 
     @property
-    def respective_codes(self) -> List[Dict[str, str]]:
-        return [
+    def ml_model(self) -> MLModel:
+        return self.ml_models[0]
+
+    @staticmethod
+    def expand_ml_models(ml_model: Union[MLModel, List[MLModel]], analyse_type) -> List[MLModel]:
+        """The requested models, ``all`` standing for every model supported for ``analyse_type``."""
+        requested = ml_model if isinstance(ml_model, list) else [ml_model]
+        analyse_type = getattr(analyse_type, "value", analyse_type)
+        supported = list(ML_MODEL_SETTINGS.get(analyse_type, {}))
+
+        ml_models: List[MLModel] = []
+        for item in requested:
+            for expanded in (supported if item == MLModel.all else [MLModel(item)]):
+                if expanded not in supported:
+                    raise ValueError(f"ML model {expanded.value} is not supported for {analyse_type}")
+                if expanded not in ml_models:
+                    ml_models.append(expanded)
+
+        if not ml_models:
+            raise ValueError(f"No ML model is supported for {analyse_type}")
+        return ml_models
+
+    @property
+    def respective_codes(self) -> Iterator[Dict[str, str]]:
+        return self.codes_of(range(len(self.file_names)))
+
+    def codes_of(self, indexes: Iterable[int]) -> Iterator[Dict[str, str]]:
+        # a generator, so session files are read one at a time while extracting
+        return (
             {
-                "file_name": fname,
-                "code": fcode,
-                "programming_language": planguage,
+                "file_name": self.file_names[i],
+                "code": self.file_contents[i],
+                "programming_language": self.programming_language[i],
             }
-            for fname, fcode, planguage in zip(self.file_names, self.file_contents, self.programming_language)
-        ]
+            for i in indexes
+        )
     
 
     @staticmethod
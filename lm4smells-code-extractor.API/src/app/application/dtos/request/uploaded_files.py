@@ -0,0 +1,88 @@
+import os
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from infrastructure.service.storage.git_repository import GitRepository
+from infrastructure.service.storage.upload_store import UploadSessionNotFoundError, path_filter, upload_store
+
+_CHUNK_SIZE = 1 << 20
+
+
+async def read_uploaded_files(files: Optional[List[UploadFile]], session_id: Optional[str]) -> Tuple[Sequence[str], List[str]]:
+    """Decoded contents and names of the request files, or of a stored upload session.
+
+    Session contents are read from the store lazily, one file at a time.
+    """
+    if files and session_id:
+        raise HTTPException(status_code=400, detail="Send either files or a session_id, not both.")
+    if not files and not session_id:
+        raise HTTPException(status_code=400, detail="Send the files to analyse or the session_id of an upload.")
+
+    if session_id:
+        try:
+            return upload_store.load_files(session_id)
+        except UploadSessionNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Upload session {session_id} not found or expired.")
+
+    raw_file_content = [await file.read() for file in files]
+    decoded_file_content = [content.decode("utf-8") for content in raw_file_content]
+    file_names = [file.filename for file in files]
+    return decoded_file_content, file_names
+
+
+async def store_archive(archive: UploadFile, include: Optional[List[str]], exclude: Optional[List[str]]) -> Dict:
+    """Spool an uploaded archive to disk in chunks and store its Python files as an upload session."""
+    fd, archive_path = tempfile.mkstemp(suffix=os.path.basename(archive.filename or "archive"))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while chunk := await archive.read(_CHUNK_SIZE):
+                f.write(chunk)
+        # unpacking a whole repository is blocking work; keep it off the event loop
+        return await run_in_threadpool(upload_store.create_session_from_archive, archive_path, include, exclude)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.unlink(archive_path)
+
+
+async def store_git_changes(
+    repo_path: str,
+    base_revision: Optional[str],
+    head_revision: str,
+    include: Optional[List[str]],
+    exclude: Optional[List[str]],
+) -> Dict:
+    """Store the Python files changed between two revisions of a local repository as an upload session.
+
+    Without a base revision every Python file of the head revision is stored.
+    The files deleted since the base are recorded in the session, so results
+    copied forward from a previous task can leave them out.
+    """
+    try:
+        return await run_in_threadpool(_store_git_changes, repo_path, base_revision, head_revision, include, exclude)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _store_git_changes(repo_path, base_revision, head_revision, include, exclude) -> Dict:
+    repository = GitRepository.open(repo_path)
+    matches = path_filter(include, exclude)
+
+    head = repository.resolve(head_revision)
+    if base_revision:
+        base = repository.resolve(base_revision)
+        changed, deleted = repository.diff(base, head)
+    else:
+        base, changed, deleted = None, repository.files(head), []
+
+    changed = [path for path in changed if matches(path)]
+    source = {
+        "type": "git",
+        "repository": repo_path,
+        "base": base,
+        "head": head,
+        "deleted": [path for path in deleted if matches(path)],
+    }
+    files = ((path, [content]) for path, content in repository.read_files(head, changed))
+    return upload_store.create_session_from_stream(files, source)
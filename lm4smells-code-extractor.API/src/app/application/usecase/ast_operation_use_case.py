@@ -1,11 +1,13 @@
 from application.dtos.request.ast_operation_input import ASTOperationInput
 import threading
 from infrastructure.modules.smells.ast.smells import Smells
+from infrastructure.modules.smells.ast.smell_pool import smell_pool
 from infrastructure.repositories.ismell_repository import ISmellRepository
 from infrastructure.repositories.smell_repository import SmellRepository
 from infrastructure.repositories.ischedule_status_repository import IScheduleStatusRepository
 from infrastructure.repositories.schedule_status_repository import ScheduleStatusRepository
 from infrastructure.service.schedule.enums.task_status import TaskStatus
+from infrastructure.service.storage.result_store import Selection, result_store
 from dataclasses import asdict
 from application.dtos.enums.analyse_type import AnalyseType
 from application.dtos.enums.approach import Approach
@@ -19,10 +21,19 @@ class ASTOperationUseCase:
 
     def ast_based_code_classification_use_case(self, input: ASTOperationInput, cancel_event: threading.Event):
         self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.RUNNING.value, Approach.AST.value)
+        carried = self.__carry_forward(input)
 
-        smell_result = self.__choose_smell_type(input)
+        smell_result = self.__analyse_with_reuse(input, cancel_event)
+        if cancel_event.is_set():
+            print("Task was cancelled")
+            self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.CANCELED.value, Approach.AST.value)
+            return
 
         if not smell_result:
+            if carried:
+                print("Nothing new to analyse, the results of the previous task were carried forward.")
+                self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.COMPLETED.value, Approach.AST.value)
+                return
             print("No smells detected, terminating the process.")
             self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.ERROR.value, Approach.AST.value)
             return
@@ -36,24 +47,81 @@ class ASTOperationUseCase:
             self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.COMPLETED.value, Approach.AST.value)
         print("AST-based code classification completed.")
 
-    def __choose_smell_type(self, input: ASTOperationInput):
+    def __analyse_with_reuse(self, input: ASTOperationInput, cancel_event: threading.Event):
+        """Reuse the stored smells of files already analysed and run the detectors on the others only.
+
+        Returns ``None`` when the analysis was cancelled before every file was analysed.
+        """
+        # per detector, the file names as its smells report them, so stored and fresh rows match
+        location_names = {
+            analyse_type: [Smells.location_file_name(analyse_type, file_name) for file_name in input.file_names]
+            for analyse_type in input.analyse_types
+        }
+        partitions = {
+            analyse_type: result_store.partition(
+                input.task_id, Approach.AST.value, analyse_type.value, Smells.VERSION, input.file_contents, location_names[analyse_type]
+            )
+            for analyse_type in input.analyse_types
+        }
+        missing = sorted({i for _, missing_files, _ in partitions.values() for i in missing_files})
+        if len(missing) < len(input.file_names):
+            print(f"[INFO] Reusing the stored smells of {len(input.file_names) - len(missing)} already analysed file(s)")
+
+        computed = []
+        if missing:
+            if len(missing) == len(input.file_names):
+                file_contents, file_names = input.file_contents, input.file_names
+            else:
+                file_contents, file_names = Selection(input.file_contents, missing), [input.file_names[i] for i in missing]
+            computed = self.__choose_smell_type(input, file_contents, file_names, cancel_event)
+            if computed is None:
+                # cancelled part way: nothing is remembered for files that were never analysed
+                return None
+
+        smells = []
+        for analyse_type, (reused, missing_files, keys) in partitions.items():
+            # a file reused for this detector may have been analysed again for another one
+            file_names = location_names[analyse_type]
+            wanted = {file_names[i] for i in missing_files}
+            fresh = [
+                smell for smell in computed
+                if Smells.ANALYSE_TYPE_OF_SMELL[smell.smell_type] == analyse_type and smell.location.file_name in wanted
+            ]
+            result_store.remember(Approach.AST.value, analyse_type.value, Smells.VERSION, keys, fresh)
+            smells.extend(result_store.in_file_order(Approach.AST.value, file_names, reused, fresh))
+        return smells
+
+    def __carry_forward(self, input: ASTOperationInput) -> int:
+        """Copy the smells of the unchanged files from the previous task, if one was given, for the detectors run by this one."""
+        if input.carry_forward is None:
+            return 0
+        smell_types = [smell_type for smell_type, analyse_type in Smells.ANALYSE_TYPE_OF_SMELL.items() if analyse_type in input.analyse_types]
+        return self.repository.copy_forward(input.carry_forward.previous_task_id, input.task_id, input.carry_forward.skip_files, smell_types)
+
+    def __choose_smell_type(self, input: ASTOperationInput, file_contents, file_names, cancel_event: threading.Event):
+        if smell_pool.should_fan_out(len(file_contents)):
+            return smell_pool.analyse(input.task_id, file_contents, file_names, input.analyse_types, cancel_event)
+
+        if len(input.analyse_types) > 1:
+            return self.smells.analyse_all(input.task_id, file_contents, file_names, input.analyse_types)
+
         if input.analyse_type == AnalyseType.long_parameter_list:
-            return self.smells.long_parameter_list(input.task_id, input.file_contents, input.file_names)
+            return self.smells.long_parameter_list(input.task_id, file_contents, file_names)
 
         elif input.analyse_type == AnalyseType.long_method:
-            return self.smells.long_method(input.task_id, input.file_contents, input.file_names)
+            return self.smells.long_method(input.task_id, file_contents, file_names)
 
         elif input.analyse_type == AnalyseType.large_class:
-            return self.smells.large_class(input.task_id, input.file_contents, input.file_names)
+            return self.smells.large_class(input.task_id, file_contents, file_names)
 
         elif input.analyse_type == AnalyseType.data_class:
-            return self.smells.data_class(input.task_id, input.file_contents[0], input.file_names[0])
+            return self.smells.data_class(input.task_id, file_contents, file_names)
 
         elif input.analyse_type == AnalyseType.lazy_class:
-            return self.smells.lazy_class(input.task_id, input.file_contents[0], input.file_names[0])
+            return self.smells.lazy_class(input.task_id, file_contents, file_names)
 
         elif input.analyse_type == AnalyseType.magic_numbers:
-            return self.smells.magic_numbers(input.task_id, input.file_contents[0], input.file_names[0])
+            return self.smells.magic_numbers(input.task_id, file_contents, file_names)
 
         else:
             raise ValueError(f"Unsupported analysis type: {input.analyse_type}")
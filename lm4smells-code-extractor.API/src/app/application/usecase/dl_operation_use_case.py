@@ -7,6 +7,8 @@ from application.dtos.enums.approach import Approach
 from infrastructure.repositories.dl_classification_repository import DLClassificationRepository
 from infrastructure.repositories.schedule_status_repository import ScheduleStatusRepository
 from infrastructure.service.schedule.enums.task_status import TaskStatus
+from infrastructure.service.storage.result_store import result_store
+from infrastructure.service.metric_codes.metric_cache import metric_cache
 from infrastructure.modules.smells.dl.dl_classifier import DLClassifier
 from infrastructure.service.extract_codes.class_extractor import ClassExtractor
 from infrastructure.service.extract_codes.method_extractor import MethodExtractor
@@ -27,29 +29,42 @@ class DLOperationUseCase:
     ):
 
         self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.RUNNING.value, Approach.DL.value)
+        carried = self.__carry_forward(input)
 
         extractor = self.__get_extractor(input.extract_type)
         if not extractor:
             raise ValueError(f"Invalid extract_type: {input.extract_type}")
 
+        scope, version = self.__result_scope(input)
+        reused, missing, keys = result_store.partition(input.task_id, Approach.DL.value, scope, version, input.file_contents, input.file_names)
+        if reused:
+            print(f"[INFO] Reusing the stored classifications of {len(reused)} already analysed file(s)")
+
         print("The code extraction process has started")
-        result = extractor.extract(input.respective_codes)
+        result = extractor.extract(input.codes_of(missing), input.metric_families)
         print("The code extraction process has finished")
 
-        if not result:
+        if not result and not reused:
+            if carried:
+                print("Nothing new to analyse, the results of the previous task were carried forward.")
+                self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.COMPLETED.value, Approach.DL.value)
+                return
             print("No code extracted, terminating the process.")
             self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.ERROR.value, Approach.DL.value)
             return
 
-        print("Mapping the extracted code metrics to the DL model input format")
-        input.map_metrics_to_dl_input(result)
-        print("Mapping the extracted code metrics to the DL model input format completed.")
+        classifications = []
+        if result:
+            print("Mapping the extracted code metrics to the DL model input format")
+            input.map_metrics_to_dl_input(result)
+            print("Mapping the extracted code metrics to the DL model input format completed.")
 
-        print("The DL-based code classification process has started")
-        classifications = self.__classify_with_dl_model(input, result)
-        print("The DL-based code classification process has finished")
+            print("The DL-based code classification process has started")
+            classifications = self.__classify_with_dl_model(input, result)
+            print("The DL-based code classification process has finished")
+        result_store.remember(Approach.DL.value, scope, version, keys, classifications)
 
-        for c in classifications:
+        for c in result_store.in_file_order(Approach.DL.value, input.file_names, reused, classifications):
             if cancel_event.is_set():
                 print("Task was cancelled")
                 self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.CANCELED.value, Approach.DL.value)
@@ -58,6 +73,30 @@ class DLOperationUseCase:
             self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.COMPLETED.value, Approach.DL.value)
         print("DL-based code classification completed.")
 
+    def __result_scope(self, input: DLOperationInput):
+        """What stored results must match besides the file content: extraction, smell, model and their versions."""
+        scope = f"{input.extract_type.name}:{input.analyse_type.value}:{input.dl_model.value}"
+        version = f"{self.dl_classifier.model_version()}-{metric_cache.version}"
+        return scope, version
+
+    def __task_scope(self, input: DLOperationInput) -> str:
+        """Extraction, smell and model of the task; its results are only carried into a task of the same scope."""
+        return f"{input.extract_type.name}:{input.analyse_type.value}:{input.dl_model.value}"
+
+    def __carry_forward(self, input: DLOperationInput) -> int:
+        """Copy the results of the unchanged files from the previous task, if one was given and it analysed the same scope."""
+        scope = self.__task_scope(input)
+        self.schedule_repository.save_task_scope(input.task_id, scope)
+        if input.carry_forward is None:
+            return 0
+
+        previous_task_id = input.carry_forward.previous_task_id
+        previous_scope = self.schedule_repository.get_task_scope(previous_task_id)
+        if previous_scope != scope:
+            print(f"[WARN] Not carrying DL results forward from {previous_task_id}: it analysed {previous_scope or 'an unknown scope'}, this task {scope}")
+            return 0
+        return self.repository.copy_forward(previous_task_id, input.task_id, input.carry_forward.skip_files)
+
     def __classify_with_dl_model(
         self,
         input: DLOperationInput,
@@ -30,7 +30,7 @@ class MessageOperationUseCase:
                 raise ValueError(f"Invalid extract_type: {message.extract_type}")
             
             print("The code extraction process has started")
-            result = extractor.extract(message.respective_codes)
+            result = extractor.extract(message.respective_codes, message.metric_families)
             print("The code extraction process has finished")
 
             for idx, extract_result in enumerate(result, start=1):
@@ -4,8 +4,11 @@ from typing import List, Dict
 from application.dtos.request.ml_operation_input import MLOperationInput
 from application.dtos.enums.extract_type import ExtractType
 from application.dtos.enums.approach import Approach
+from application.dtos.enums.ml_model import MLModel
 from infrastructure.repositories.ml_classification_repository import MLClassificationRepository
 from infrastructure.service.schedule.enums.task_status import TaskStatus
+from infrastructure.service.storage.result_store import result_store
+from infrastructure.service.metric_codes.metric_cache import metric_cache
 from infrastructure.modules.smells.ml.ml_classifier import MLClassifier
 from infrastructure.service.extract_codes.class_extractor import ClassExtractor
 from infrastructure.service.extract_codes.method_extractor import MethodExtractor
@@ -26,29 +29,59 @@ class MLOperationUseCase:
     ):
 
         self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.RUNNING.value, Approach.ML.value)
+        carried = self.__carry_forward(input)
 
         extractor = self.__get_extractor(input.extract_type)
         if not extractor:
             raise ValueError(f"Invalid extract_type: {input.extract_type}")
 
+        scopes = {ml_model: self.__result_scope(input, ml_model) for ml_model in input.ml_models}
+        partitions = {
+            ml_model: result_store.partition(input.task_id, Approach.ML.value, scope, version, input.file_contents, input.file_names)
+            for ml_model, (scope, version) in scopes.items()
+        }
+        # a file is extracted once, however many models still have to classify it
+        missing = sorted({i for _, missing_files, _ in partitions.values() for i in missing_files})
+        if len(missing) < len(input.file_names):
+            print(f"[INFO] Reusing the stored classifications of {len(input.file_names) - len(missing)} already analysed file(s)")
+
         print("The code extraction process has started")
-        result = extractor.extract(input.respective_codes)
+        result = extractor.extract(input.codes_of(missing), input.metric_families)
         print("The code extraction process has finished")
 
-        if not result:
+        if not result and not any(reused for reused, _, _ in partitions.values()):
+            if carried:
+                print("Nothing new to analyse, the results of the previous task were carried forward.")
+                self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.COMPLETED.value, Approach.ML.value)
+                return
             print("No code extracted, terminating the process.")
             self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.ERROR.value, Approach.ML.value)
             return
 
-        print("Mapping the extracted code metrics to the ML model input format")
-        input.map_metrics_to_ml_input(result)
-        print("Mapping the extracted code metrics to the ML model input format completed.")
+        computed = {}
+        if result:
+            print("Mapping the extracted code metrics to the ML model input format")
+            input.map_metrics_to_ml_input(result)
+            print("Mapping the extracted code metrics to the ML model input format completed.")
+
+            print("The ML-based code classification process has started")
+            computed = self.__classify_with_ml_models(input, result, [ml_model for ml_model, (_, missing_files, _) in partitions.items() if missing_files])
+            print("The ML-based code classification process has finished")
+
+        classifications = {}
+        for ml_model, (reused, missing_files, keys) in partitions.items():
+            # a file reused for this model may have been extracted again for another one
+            wanted = {input.file_names[i] for i in missing_files}
+            fresh = [c for c in computed.get(ml_model, []) if c.file_name in wanted]
+            scope, version = scopes[ml_model]
+            result_store.remember(Approach.ML.value, scope, version, keys, fresh)
+            classifications[ml_model] = result_store.in_file_order(Approach.ML.value, input.file_names, reused, fresh)
 
-        print("The ML-based code classification process has started")
-        classifications = self.__classify_with_ml_model(input, result)
-        print("The ML-based code classification process has finished")
+        to_save = [c for model_classifications in classifications.values() for c in model_classifications]
+        if input.ensemble and len(classifications) > 1:
+            to_save.extend(self.ml_classifier.ensemble(input.task_id, classifications))
 
-        for c in classifications:
+        for c in to_save:
             if cancel_event.is_set():
                 print("Task was cancelled")
                 self.schedule_repository.save_schedule_status(input.task_id, TaskStatus.CANCELED.value, Approach.ML.value)
@@ -58,15 +91,43 @@ class MLOperationUseCase:
         print("ML-based code classification completed.")
 
 
-    def __classify_with_ml_model(
+    def __result_scope(self, input: MLOperationInput, ml_model: MLModel):
+        """What stored results must match besides the file content: extraction, smell, model and their versions."""
+        scope = f"{input.extract_type.name}:{input.analyse_type.value}:{ml_model.value}"
+        version = f"{self.ml_classifier.model_version(input.analyse_type, ml_model)}-{metric_cache.version}"
+        return scope, version
+
+    def __task_scope(self, input: MLOperationInput) -> str:
+        """Extraction, smell and models of the task; its results are only carried into a task of the same scope."""
+        scope = f"{input.extract_type.name}:{input.analyse_type.value}:{'+'.join(sorted(m.value for m in input.ml_models))}"
+        if input.ensemble and len(input.ml_models) > 1:
+            scope += f":{MLClassifier.ENSEMBLE_MODEL}"
+        return scope
+
+    def __carry_forward(self, input: MLOperationInput) -> int:
+        """Copy the results of the unchanged files from the previous task, if one was given and it analysed the same scope."""
+        scope = self.__task_scope(input)
+        self.schedule_repository.save_task_scope(input.task_id, scope)
+        if input.carry_forward is None:
+            return 0
+
+        previous_task_id = input.carry_forward.previous_task_id
+        previous_scope = self.schedule_repository.get_task_scope(previous_task_id)
+        if previous_scope != scope:
+            print(f"[WARN] Not carrying ML results forward from {previous_task_id}: it analysed {previous_scope or 'an unknown scope'}, this task {scope}")
+            return 0
+        return self.repository.copy_forward(previous_task_id, input.task_id, input.carry_forward.skip_files)
+
+    def __classify_with_ml_models(
         self,
         input: MLOperationInput,
         extraction_results: List[Dict],
+        ml_models: List[MLModel],
     ):
         if input.extract_type == ExtractType.classes:
-            return self.ml_classifier.classify_classes(input.task_id, extraction_results, input.ml_model, input.analyse_type)
+            return self.ml_classifier.classify_with_models(input.task_id, extraction_results, ml_models, input.analyse_type, element_type='class')
         elif input.extract_type == ExtractType.methods:
-            return self.ml_classifier.classify_methods(input.task_id, extraction_results, input.ml_model, input.analyse_type)
+            return self.ml_classifier.classify_with_models(input.task_id, extraction_results, ml_models, input.analyse_type, element_type='method')
         else:
             raise ValueError(f"Unsupported extraction type: {input.extract_type}")
 
@@ -0,0 +1,83 @@
+"""Measure the AST detectors in-process against the process pool.
+
+Run from the ``app`` folder:
+
+    python -m benchmarks.ast_parallel_benchmark [path ...] [--limit N] [--workers 2 4 8]
+
+Files are read from the given paths (the standard library by default) and
+every detector runs over them, once with ``Smells.analyse_all`` on the
+calling thread and once per worker count on a ``SmellPool``. The script
+reports files/sec and fails if the pool returns different occurrences or
+a different order.
+"""
+import argparse
+import ast
+import os
+import sysconfig
+import time
+from typing import List, Tuple
+
+from application.dtos.request.ast_operation_input import ASTOperationInput
+from infrastructure.modules.smells.ast.smell_pool import SmellPool
+from infrastructure.modules.smells.ast.smells import Smells
+
+
+def collect_files(paths: List[str], limit: int) -> Tuple[List[str], List[str]]:
+    contents: List[str] = []
+    names: List[str] = []
+    for path in paths:
+        files = [path] if os.path.isfile(path) else (
+            os.path.join(root, name)
+            for root, _, file_names in sorted(os.walk(path))
+            for name in sorted(file_names)
+            if name.endswith(".py")
+        )
+        for file_path in files:
+            try:
+                with open(file_path, encoding="utf-8") as f:
+                    source = f.read()
+                ast.parse(source)
+            except (SyntaxError, UnicodeDecodeError, ValueError):
+                continue
+            contents.append(source)
+            names.append(file_path)
+            if len(contents) >= limit:
+                return contents, names
+    return contents, names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=[sysconfig.get_paths()["stdlib"]])
+    parser.add_argument("--limit", type=int, default=1000, help="Number of files to analyse.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1])
+    parser.add_argument("--chunk-size", type=int, default=32)
+    args = parser.parse_args()
+
+    contents, names = collect_files(args.paths, args.limit)
+    analyse_types = ASTOperationInput.ALL_ANALYSE_TYPES
+
+    started = time.perf_counter()
+    expected = Smells().analyse_all("benchmark", contents, names, analyse_types)
+    baseline = time.perf_counter() - started
+    print(f"{len(contents)} files, {len(expected)} occurrences, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'files/s':>9} {'speed-up':>9}")
+    print(f"{'inline':>8} {baseline:>9.2f} {len(contents) / baseline:>9.1f} {1.0:>8.1f}x")
+
+    for workers in sorted(set(args.workers)):
+        pool = SmellPool(workers=workers, chunk_size=args.chunk_size, min_files=0)
+        # start the workers before timing, as a long-running API would have them
+        pool.analyse("benchmark", contents[:workers], names[:workers], analyse_types)
+
+        started = time.perf_counter()
+        result = pool.analyse("benchmark", contents, names, analyse_types)
+        elapsed = time.perf_counter() - started
+        pool.shutdown()
+
+        if result != expected:
+            raise SystemExit(f"Pool with {workers} workers returned different occurrences")
+        print(f"{workers:>8} {elapsed:>9.2f} {len(contents) / elapsed:>9.1f} {baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
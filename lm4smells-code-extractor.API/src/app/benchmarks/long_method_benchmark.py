@@ -0,0 +1,87 @@
+"""Measure long-method detection on generated files with thousands of functions.
+
+Run from the ``app`` folder:
+
+    python -m benchmarks.long_method_benchmark [--sizes 1000 2000 4000 8000]
+
+For each size a module with that many functions (plain, async and nested)
+is generated. The script times ``Smells.long_method`` against the line-scan
+detector it replaced, which is reproduced below as the baseline.
+"""
+import argparse
+import time
+from typing import List
+
+from infrastructure.modules.smells.ast.smells import Smells
+from infrastructure.service.metric_codes.ast_analyzer import ASTAnalyzer
+
+
+def generate_module(functions: int) -> str:
+    chunks: List[str] = []
+    for i in range(functions):
+        if i % 10 == 0:
+            chunks.append(
+                f"def outer_{i}(a, b, c):\n"
+                f"    def inner_{i}(x):\n"
+                f"        return x * 2\n"
+                f"    # helper\n"
+                f"    return inner_{i}(a) + b + c\n"
+            )
+        elif i % 10 == 1:
+            chunks.append(f"async def fetch_{i}(session, url, *, retries=3):\n    return await session.get(url)\n")
+        else:
+            body = "".join(f"    total += {j}\n" for j in range(i % 7))
+            chunks.append(f"def func_{i}(a, b=1, *args, **kwargs):\n    total = a + b\n{body}    return total\n")
+    return "\n\n".join(chunks)
+
+
+def line_scan_long_method(content: str, file_name: str, max_lines: int = 67) -> int:
+    """The previous detector: scan for ``def `` prefixes, linear parameter search per method."""
+    analyzer = ASTAnalyzer()
+    lines = content.splitlines()
+    parameters_data = analyzer.count_parameters_from_source(content, file_name)
+    found = 0
+    current = None
+
+    def close(start_line: int, end_line: int) -> None:
+        nonlocal found
+        analyzer.calculate_loc_and_total(lines[start_line:end_line])
+        next((m["parameters"]["total"] for m in parameters_data if m["line"] == start_line + 1), 0)
+        found += 1
+
+    for i, line in enumerate(lines):
+        if line.strip().startswith("def "):
+            if current is not None:
+                close(current, i - 1)
+            current = i
+    if current is not None:
+        close(current, len(lines) - 1)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 4000, 8000])
+    args = parser.parse_args()
+
+    smells = Smells()
+    print(f"{'functions':>10} {'line scan':>12} {'ast spans':>12} {'speed-up':>9} {'us/function':>12}")
+    for size in args.sizes:
+        content = generate_module(size)
+
+        started = time.perf_counter()
+        line_scan_long_method(content, "generated.py")
+        line_scan_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        detected = smells.long_method("benchmark", [content], ["generated.py"])
+        span_time = time.perf_counter() - started
+
+        print(
+            f"{len(detected):>10} {line_scan_time:>11.3f}s {span_time:>11.3f}s "
+            f"{line_scan_time / span_time:>8.1f}x {span_time / len(detected) * 1e6:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
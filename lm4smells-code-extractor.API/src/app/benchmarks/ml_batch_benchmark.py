@@ -0,0 +1,114 @@
+"""Compare per-element ML scoring with the batched ``MLClassifier`` path.
+
+Run from the ``app`` folder, with the model paths configured:
+
+    python -m benchmarks.ml_batch_benchmark [path ...] [--limit N] [--analyse-type long-method] [--model LGBM]
+
+Methods are extracted from the given paths (the standard library by
+default) and mapped to the ML input format. The script scores them once
+element by element, as the classifier used to, and once through
+``MLClassifier.classify_methods``, reports elements/sec and fails if a
+label or a confidence differs. The registry serves the exported artifact
+of the model when there is one, and both paths then score with it.
+"""
+import argparse
+import ast
+import os
+import sysconfig
+import time
+from typing import Dict, List
+
+import pandas as pd
+from pycaret.classification import predict_model
+
+from application.dtos.enums.analyse_type import AnalyseType
+from application.dtos.enums.ml_model import MLModel
+from application.dtos.request.ml_operation_input import MLOperationInput
+from infrastructure.modules.smells.ml.exported_pipeline import ExportedPipeline
+from infrastructure.modules.smells.ml.ml_classifier import MLClassifier
+from infrastructure.modules.smells.ml.model_registry import ml_model_registry
+from infrastructure.service.extract_codes.method_extractor import MethodExtractor
+
+
+def collect_files(paths: List[str], limit: int) -> List[Dict]:
+    code_files: List[Dict] = []
+    for path in paths:
+        files = [path] if os.path.isfile(path) else (
+            os.path.join(root, name)
+            for root, _, names in sorted(os.walk(path))
+            for name in sorted(names)
+            if name.endswith(".py")
+        )
+        for file_path in files:
+            try:
+                with open(file_path, encoding="utf-8") as f:
+                    source = f.read()
+                ast.parse(source)
+            except (SyntaxError, UnicodeDecodeError, ValueError):
+                continue
+            code_files.append({"programming_language": "python", "file_name": file_path, "code": source})
+            if len(code_files) >= limit:
+                return code_files
+    return code_files
+
+
+def score_one_by_one(model, extraction_results: List[Dict]):
+    scored = []
+    for result in extraction_results:
+        data = pd.DataFrame([result.get("code_metric", {}) or {}])
+        if isinstance(model, ExportedPipeline):
+            labels, scores = model.predict_with_scores(data)
+            if scores is None:
+                try:
+                    scores = [abs(model.decision_function(data)[0])]
+                except Exception:
+                    scores = [0.0]
+            scored.append((str(labels[0]), float(scores[0])))
+            continue
+
+        pred_df = predict_model(model, data=data, verbose=False)
+        if "prediction_score" in pred_df.columns:
+            confidence = float(pred_df["prediction_score"].iloc[0])
+        else:
+            try:
+                confidence = float(abs(model.decision_function(data)[0]))
+            except Exception:
+                confidence = 0.0
+        scored.append((str(pred_df["prediction_label"].iloc[0]), confidence))
+    return scored
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=[sysconfig.get_paths()["stdlib"]])
+    parser.add_argument("--limit", type=int, default=100, help="Number of files to extract methods from.")
+    parser.add_argument("--analyse-type", type=AnalyseType, default=AnalyseType.long_method)
+    parser.add_argument("--model", type=MLModel, default=MLModel.LGBM)
+    args = parser.parse_args()
+
+    extraction_results = MethodExtractor().extract(collect_files(args.paths, args.limit), MLOperationInput.metric_families)
+    MLOperationInput.map_metrics_to_ml_input(extraction_results)
+
+    classifier = MLClassifier()
+    # load the model before timing, as a long-running API would have it
+    model = ml_model_registry.get(classifier._choose_models(args.analyse_type.value, args.model))
+
+    started = time.perf_counter()
+    expected = score_one_by_one(model, extraction_results)
+    one_by_one = time.perf_counter() - started
+
+    started = time.perf_counter()
+    classifications = classifier.classify_methods("benchmark", extraction_results, args.model, args.analyse_type)
+    batched = time.perf_counter() - started
+
+    print(f"{len(extraction_results)} methods, {args.analyse_type.value} with {args.model.value}")
+    print(f"{'path':>12} {'seconds':>9} {'methods/s':>10}")
+    print(f"{'one by one':>12} {one_by_one:>9.2f} {len(extraction_results) / one_by_one:>10.1f}")
+    print(f"{'batched':>12} {batched:>9.2f} {len(extraction_results) / batched:>10.1f}  ({one_by_one / batched:.1f}x)")
+
+    if [(c.classification, c.confidence_score) for c in classifications] != expected:
+        raise SystemExit("The batched path returned different labels or confidences")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compare the in-process radon engine against the ``radon`` CLI subprocesses.
+
+Run from the ``app`` folder:
+
+    python -m benchmarks.radon_analyzer_benchmark [path ...] [--limit N]
+
+Items are the methods extracted by ``MethodExtractor`` from the given paths
+(the standard library by default). The script reports items/sec for both
+paths and fails if their JSON output differs for any item.
+"""
+import argparse
+import ast
+import json
+import os
+import sysconfig
+import time
+from typing import List
+
+from infrastructure.service.metric_codes.radon_analyzer import RadonAnalyzer
+
+
+def collect_items(paths: List[str], limit: int) -> List[str]:
+    items: List[str] = []
+    for path in paths:
+        files = [path] if os.path.isfile(path) else (
+            os.path.join(root, name)
+            for root, _, names in sorted(os.walk(path))
+            for name in sorted(names)
+            if name.endswith(".py")
+        )
+        for file_path in files:
+            try:
+                with open(file_path, encoding="utf-8") as f:
+                    tree = ast.parse(f.read())
+            except (SyntaxError, UnicodeDecodeError, ValueError):
+                continue
+            for node in ast.walk(tree):
+                if isinstance(node, ast.FunctionDef):
+                    items.append(ast.unparse(node))
+                    if len(items) >= limit:
+                        return items
+    return items
+
+
+def measure(analyze, items: List[str]):
+    started = time.perf_counter()
+    results = [analyze(code) for code in items]
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=[sysconfig.get_paths()["stdlib"]])
+    parser.add_argument("--limit", type=int, default=200, help="Number of extracted items to measure.")
+    args = parser.parse_args()
+
+    items = collect_items(args.paths, args.limit)
+    analyzer = RadonAnalyzer()
+
+    in_process, in_process_time = measure(analyzer.analyze, items)
+    subprocess_results, subprocess_time = measure(analyzer.analyze_with_cli, items)
+
+    mismatches = sum(
+        1 for ours, cli in zip(in_process, subprocess_results)
+        if json.loads(json.dumps(ours)) != cli
+    )
+
+    print(f"items:       {len(items)}")
+    print(f"subprocess:  {len(items) / subprocess_time:10.1f} items/sec ({subprocess_time:.2f}s)")
+    print(f"in-process:  {len(items) / in_process_time:10.1f} items/sec ({in_process_time:.2f}s)")
+    print(f"speed-up:    {subprocess_time / in_process_time:10.1f}x")
+    print(f"mismatches:  {mismatches}")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 
@@ -47,10 +48,70 @@ class DBSettings(BaseSettings):
         pass
 
 
+class MetricCacheSettings(BaseSettings):
+    metric_cache_size: int = 10000
+    metric_cache_dir: Optional[str] = None
+    metric_cache_disk_size: int = 200000
+
+
+class ASTWorkerSettings(BaseSettings):
+    ast_workers: Optional[int] = None       # None uses every CPU, 1 keeps the analysis in-process
+    ast_chunk_size: int = 32                # files sent to a worker at a time
+    ast_parallel_min_files: int = 8         # smaller uploads are not worth the inter-process round trip
+
+
+class UploadStoreSettings(BaseSettings):
+    upload_store_dir: str = "./.uploads"
+    upload_session_ttl: int = 86400        # seconds an upload session can be scheduled against
+
+
+class GitSettings(BaseSettings):
+    git_repository_root: Optional[str] = None   # folder holding the repositories git analysis may read; unset disables it
+
+
+class ResultStoreSettings(BaseSettings):
+    result_store_enabled: bool = True
+    result_store_size: int = 10000           # files whose results are kept in memory
+    result_store_dir: Optional[str] = None   # sqlite copy that survives restarts
+    result_store_disk_size: int = 200000     # files whose results the sqlite copy keeps, least recently used dropped first
+
+
+class MLModelSettings(BaseSettings):
+    ml_model_memory_budget_mb: int = 512     # loaded ML pipelines kept in memory, least recently used dropped first
+    ml_model_preload: Optional[str] = None   # "all" or comma-separated analyse-type:MODEL pairs loaded at startup
+    ml_batch_size: int = 4096                # elements scored per predict call
+    ml_use_exported_models: bool = True      # load <model>.inference.joblib, when exported, instead of the pycaret pipeline
+
+
+class DLModelSettings(BaseSettings):
+    dl_model_preload: bool = True            # load the DL model at startup instead of on the first DL task
+    dl_batch_size: int = 8192                # elements scored per forward pass
+    dl_use_numpy_engine: bool = False        # run the exported NumPy bundle of the model instead of TensorFlow
+
+
+class ModelCacheSettings(BaseSettings):
+    model_cache_dir: Optional[str] = None    # compiled, memory-mapped ML/DL models reused across starts and workers
+
+
+class InferenceQueueSettings(BaseSettings):
+    inference_queue_enabled: bool = True            # combine the predictions of concurrent tasks into shared batches
+    inference_queue_max_batch_size: int = 4096      # rows that close a shared batch
+    inference_queue_max_wait_ms: float = 5.0        # longest a task waits for others to join its batch
+
+
 class Settings(
     RabbitMQSettings,
     DBSettings,
     LoadMachineAndDeepLearningModels,
+    MetricCacheSettings,
+    ASTWorkerSettings,
+    UploadStoreSettings,
+    GitSettings,
+    ResultStoreSettings,
+    MLModelSettings,
+    DLModelSettings,
+    ModelCacheSettings,
+    InferenceQueueSettings,
 ):
     pass
 
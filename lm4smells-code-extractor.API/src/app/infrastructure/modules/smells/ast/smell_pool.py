@@ -0,0 +1,106 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from application.dtos.enums.analyse_type import AnalyseType
+from domain.entities.smell_occurrence import SmellOccurrence
+from infrastructure.config.settings import settings
+from infrastructure.modules.smells.ast.smells import Smells
+
+# one detector instance per worker process, created on its first chunk
+_worker_smells: Optional[Smells] = None
+
+
+def _analyse_chunk(task_id: str, file_contents: List[str], file_names: List[str], analyse_types: List[AnalyseType]) -> Dict[AnalyseType, List[SmellOccurrence]]:
+    global _worker_smells
+    if _worker_smells is None:
+        _worker_smells = Smells()
+    return _worker_smells.analyse_by_type(task_id, file_contents, file_names, analyse_types)
+
+
+class SmellPool:
+    """Process pool fanning the AST detectors out over chunks of uploaded files.
+
+    Each chunk is parsed and analysed in a worker process, so large uploads
+    use every core instead of the one thread the task runs on. Results are
+    merged by detector and then by chunk, which gives the same order as
+    :meth:`Smells.analyse_all` over the whole upload.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 32, min_files: int = 8):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.min_files = min_files
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def should_fan_out(self, file_count: int) -> bool:
+        return self.workers > 1 and file_count >= max(self.min_files, 2)
+
+    def analyse(
+        self,
+        task_id: str,
+        file_contents: List[str],
+        file_names: List[str],
+        analyse_types: List[AnalyseType],
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Optional[List[SmellOccurrence]]:
+        """Analyse the upload on the pool.
+
+        Once ``cancel_event`` is set, pending chunks are dropped and ``None`` is
+        returned, so a cancelled run is never mistaken for a complete result.
+        """
+        chunk_size = min(self.chunk_size, math.ceil(len(file_contents) / self.workers)) or 1
+        executor = self._get_executor()
+
+        futures: List[Future] = [
+            executor.submit(
+                _analyse_chunk,
+                task_id,
+                file_contents[start:start + chunk_size],
+                file_names[start:start + chunk_size],
+                analyse_types,
+            )
+            for start in range(0, len(file_contents), chunk_size)
+        ]
+
+        chunks: List[Dict[AnalyseType, List[SmellOccurrence]]] = []
+        for future in futures:
+            if cancel_event is not None and cancel_event.is_set():
+                for pending in futures:
+                    pending.cancel()
+                return None
+            chunks.append(future.result())
+
+        return [
+            smell
+            for analyse_type in analyse_types
+            for chunk in chunks
+            for smell in chunk[analyse_type]
+        ]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # the API process runs threads (task manager, broker client), so workers are spawned, not forked
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+
+smell_pool = SmellPool(
+    workers=settings.ast_workers,
+    chunk_size=settings.ast_chunk_size,
+    min_files=settings.ast_parallel_min_files,
+)
@@ -1,5 +1,5 @@
 from infrastructure.service.metric_codes.ast_analyzer import ASTAnalyzer
-from typing import List, Optional, Dict, Any, Union
+from typing import Iterator, List, Optional, Dict, Any, Union
 from dataclasses import dataclass
 from domain.entities.smell_occurrence import SmellOccurrence
 from uuid import uuid4
@@ -7,28 +7,98 @@ from domain.value_objects.smell_type import SmellType
 from domain.value_objects.location import Location
 from domain.value_objects.metrics import Metrics
 from domain.value_objects.author import Author
-import ast
+from application.dtos.enums.analyse_type import AnalyseType
 
 
 class Smells:
+    # bump whenever a detector or one of its thresholds changes, so stored results are not reused
+    VERSION = "1"
+
+    # detector producing each smell type, both the smell and its negative
+    ANALYSE_TYPE_OF_SMELL = {
+        SmellType.LONG_PARAMETER_LIST.value: AnalyseType.long_parameter_list,
+        SmellType.NO_LONG_PARAMETER_LIST.value: AnalyseType.long_parameter_list,
+        SmellType.LONG_METHOD.value: AnalyseType.long_method,
+        SmellType.NO_LONG_METHOD.value: AnalyseType.long_method,
+        SmellType.LARGE_CLASS.value: AnalyseType.large_class,
+        SmellType.NO_LARGE_CLASS.value: AnalyseType.large_class,
+        SmellType.DATA_CLASS.value: AnalyseType.data_class,
+        SmellType.NO_DATA_CLASS.value: AnalyseType.data_class,
+        SmellType.LAZY_CLASS.value: AnalyseType.lazy_class,
+        SmellType.NO_LAZY_CLASS.value: AnalyseType.lazy_class,
+        SmellType.MAGIC_NUMBERS.value: AnalyseType.magic_numbers,
+        SmellType.NO_MAGIC_NUMBERS.value: AnalyseType.magic_numbers,
+    }
+
     def __init__(self):
         self.ast_analyzer = ASTAnalyzer()
 
+    def analyse_all(self, task_id: str, file_contents: List[str], file_names: List[str], analyse_types: List[AnalyseType]) -> List[SmellOccurrence]:
+        """Run several detectors over an upload, parsing and indexing each file only once.
+
+        Occurrences are grouped by detector, in ``analyse_types`` order, and by
+        file within a detector, as if each detector had been scheduled alone.
+        """
+        smells_by_type = self.analyse_by_type(task_id, file_contents, file_names, analyse_types)
+        return [smell for analyse_type in analyse_types for smell in smells_by_type[analyse_type]]
+
+    def analyse_by_type(self, task_id: str, file_contents: List[str], file_names: List[str], analyse_types: List[AnalyseType]) -> Dict[AnalyseType, List[SmellOccurrence]]:
+        """Same as :meth:`analyse_all`, with the occurrences of every detector kept apart."""
+        detectors = self._file_detectors()
+        unsupported = [analyse_type for analyse_type in analyse_types if analyse_type not in detectors]
+        if unsupported:
+            raise ValueError(f"Unsupported analysis type: {unsupported[0]}")
+
+        smells_by_type: Dict[AnalyseType, List[SmellOccurrence]] = {analyse_type: [] for analyse_type in analyse_types}
+
+        for file_name, content in zip(file_names, file_contents):
+            facts = self.ast_analyzer.index_source(content, file_name)
+            with self.ast_analyzer.shared_facts(facts):
+                for analyse_type in analyse_types:
+                    smells_by_type[analyse_type].extend(detectors[analyse_type](task_id, content, file_name))
+
+        return smells_by_type
+
+    def _file_detectors(self):
+        """Every detector as a callable taking (task_id, file_content, file_name)."""
+        return {
+            AnalyseType.long_parameter_list: lambda task_id, content, name: self.long_parameter_list(task_id, [content], [name]),
+            AnalyseType.long_method: lambda task_id, content, name: self.long_method(task_id, [content], [name]),
+            AnalyseType.large_class: lambda task_id, content, name: self.large_class(task_id, [content], [name]),
+            AnalyseType.data_class: lambda task_id, content, name: self.data_class(task_id, [content], [name]),
+            AnalyseType.lazy_class: lambda task_id, content, name: self.lazy_class(task_id, [content], [name]),
+            AnalyseType.magic_numbers: lambda task_id, content, name: self.magic_numbers(task_id, [content], [name]),
+        }
+
+    @staticmethod
+    def _as_file_lists(file_contents: Union[str, List[str]], file_names: Union[str, List[str]]):
+        # single-file callers pass plain strings
+        if isinstance(file_contents, str):
+            file_contents = [file_contents]
+        if isinstance(file_names, str):
+            file_names = [file_names]
+        return file_contents, file_names
+
+    @staticmethod
+    def location_file_name(analyse_type: AnalyseType, file_name: str) -> str:
+        """The file name the detector of ``analyse_type`` reports for an uploaded ``file_name``."""
+        # data-class locations have always used forward slashes
+        return file_name.replace("\\", "/") if analyse_type == AnalyseType.data_class else file_name
+
     def long_parameter_list(self, task_id: str, file_contents: List[str], file_names: List[str], max_parameters: int = 4):
     
         smells: List[SmellOccurrence] = []
-        files_data = self.ast_analyzer.count_parameters_from_sources(file_contents, file_names)
-
-        for file_name, methods in files_data.items():
-            for method in methods:
-                total = method["parameters"]["total"]
+        # every file is analysed, repeated names included, like the other detectors and the process pool do
+        for file_name, content in zip(file_names, file_contents):
+            for method in self.ast_analyzer.index_source(content, file_name).functions:
+                total = method.parameters["total"]
                 
                 if total > max_parameters:
                     smell_type = SmellType.LONG_PARAMETER_LIST.value
-                    description = f"Method '{method['name']}' has {total} parameters."
+                    description = f"Method '{method.name}' has {total} parameters."
                 else:
                     smell_type = SmellType.NO_LONG_PARAMETER_LIST.value
-                    description = f"Method '{method['name']}' has {total} parameters."
+                    description = f"Method '{method.name}' has {total} parameters."
 
                 smells.append(
                     SmellOccurrence(
@@ -38,8 +108,8 @@ class Smells:
                         description=description,
                         location=Location(
                             file_name=file_name,
-                            start_line=method["line"],
-                            end_line=method["line"],
+                            start_line=method.line,
+                            end_line=method.line,
                         ),
                         metrics=Metrics(PAR=total),
                     )
@@ -51,70 +121,20 @@ class Smells:
         smells: List[SmellOccurrence] = []
         
         for file_name, content in zip(file_names, file_contents):
-            lines = content.splitlines()
-            parameters_data = self.ast_analyzer.count_parameters_from_sources([content], [file_name])
-            parameters_data = parameters_data.get(file_name, [])
-
-            current_function = None
-
-            for i, line in enumerate(lines):
-                stripped_line = line.strip()
-
-                if stripped_line.startswith("def "):
-                    
-                    if current_function:
-                        start_line = current_function["start"]
-                        end_line = i - 1
-                        loc, total_lines = self.ast_analyzer.calculate_loc_and_total(lines[start_line:end_line])
-
-                        method_par = next(
-                            (m["parameters"]["total"] for m in parameters_data if m["line"] == start_line + 1),
-                            0
-                        )
-
-                        if total_lines > max_lines:
-                            smell_type = SmellType.LONG_METHOD.value
-                            description = f"Method '{current_function['name']}' too long: {total_lines} lines (max: {max_lines})."
-                        else:
-                            smell_type = SmellType.NO_LONG_METHOD.value
-                            description = f"Method '{current_function['name']}' has {total_lines} lines."
-
-                        smells.append(
-                            SmellOccurrence(
-                                id=task_id,
-                                definition_author="Scylla",
-                                smell_type=smell_type,
-                                description=description,
-                                location=Location(
-                                    file_name=file_name,
-                                    start_line=start_line + 1,
-                                    end_line=end_line + 1,
-                                ),
-                                metrics=Metrics(MLOC=total_lines, PAR=method_par),
-                            )
-                        )
-
-                    
-                    method_name = stripped_line.split("def ")[1].split("(")[0].strip()
-                    current_function = {"name": method_name, "start": i}
+            facts = self.ast_analyzer.index_source(content, file_name)
 
-            
-            if current_function:
-                start_line = current_function["start"]
-                end_line = len(lines) - 1
-                loc, total_lines = self.ast_analyzer.calculate_loc_and_total(lines[start_line:end_line])
-
-                method_par = next(
-                    (m["parameters"]["total"] for m in parameters_data if m["line"] == start_line + 1),
-                    0
-                )
+            # every def and async def, nested ones included, in source order;
+            # the span comes from the AST so nested code and trailing comments cannot shift it
+            for method in sorted(facts.functions, key=lambda f: f.line):
+                total_lines = method.end_line - method.line + 1
+                method_par = method.parameters["total"]
 
                 if total_lines > max_lines:
                     smell_type = SmellType.LONG_METHOD.value
-                    description = f"Method '{current_function['name']}' too long: {total_lines} lines (max: {max_lines})."
+                    description = f"Method '{method.name}' too long: {total_lines} lines (max: {max_lines})."
                 else:
                     smell_type = SmellType.NO_LONG_METHOD.value
-                    description = f"Method '{current_function['name']}' has {total_lines} lines."
+                    description = f"Method '{method.name}' has {total_lines} lines."
 
                 smells.append(
                     SmellOccurrence(
@@ -124,8 +144,8 @@ class Smells:
                         description=description,
                         location=Location(
                             file_name=file_name,
-                            start_line=start_line + 1,
-                            end_line=end_line + 1,
+                            start_line=method.line,
+                            end_line=method.end_line,
                         ),
                         metrics=Metrics(MLOC=total_lines, PAR=method_par),
                     )
@@ -155,23 +175,12 @@ class Smells:
                 max_lines, max_attrs = 200, 40
 
             
-            noa_stats = self.ast_analyzer.count_attributes(content, file_name)
-            nom_stats = self.ast_analyzer.count_methods(content, file_name)
-            
-            
+            facts = self.ast_analyzer.index_source(content, file_name)
 
-
-            class_locs = {}
-        
-            for class_name, metrics_data in nom_stats.items():
-                start_line = metrics_data.get("start_line", 1)
-                loc = self.ast_analyzer.count_class_loc(content, file_name, start_line - 1)
-                class_locs[class_name] = loc
-
-            for class_name, metrics_data in nom_stats.items():
-                total_attrs = noa_stats.get(class_name, {}).get("total_attributes", 0)
-                total_methods = metrics_data.get("total_methods", 0)
-                loc = class_locs.get(class_name, 0)
+            for class_name, class_facts in facts.classes_by_name().items():
+                total_attrs = class_facts.noa
+                total_methods = class_facts.nom
+                loc = class_facts.loc
 
                 if (total_attrs + total_methods) > max_attrs or loc > max_lines:
                     smell_type = SmellType.LARGE_CLASS.value
@@ -195,8 +204,8 @@ class Smells:
                         description=description,
                         location=Location(
                             file_name=file_name,
-                            start_line=metrics_data.get("start_line", 1),
-                            end_line=metrics_data.get("start_line", 1) + loc - 1 if loc > 0 else 1,
+                            start_line=class_facts.start_line,
+                            end_line=class_facts.start_line + loc - 1 if loc > 0 else 1,
                         ),
                         metrics=Metrics(
                             MLOC=loc,
@@ -211,86 +220,84 @@ class Smells:
     def data_class(
         self,
         task_id: str,
-        file_content: str,
-        filename: str,
+        file_contents: Union[str, List[str]],
+        file_names: Union[str, List[str]],
         lwmc_threshold: int = 50,
         lcom_threshold: float = 0.8
     ):
-        noa_stats = self.ast_analyzer.count_attributes(file_content, filename)
-        nom_stats = self.ast_analyzer.count_methods(file_content, filename)
-        lwmc_stats = self.ast_analyzer.calculate_lwmc(file_content, filename)
-        lcom_stats = self.ast_analyzer.calculate_lcom(file_content, filename)
+        file_contents, file_names = self._as_file_lists(file_contents, file_names)
 
         smells: List[SmellOccurrence] = []
 
-        for class_name in nom_stats.keys():
-            start_line = nom_stats[class_name]["start_line"]
-            loc = self.ast_analyzer.count_class_loc(file_content, filename, start_line - 1)
-
-            noa = noa_stats.get(class_name, {}).get("total_attributes", 0)
-            nom = nom_stats[class_name]["total_methods"]
-            lwmc = lwmc_stats.get(class_name, 0)
-            lcom = lcom_stats.get(class_name, 0.0)
-
-            if lwmc > lwmc_threshold or lcom > lcom_threshold:
-                smell_type = SmellType.DATA_CLASS.value
-                description = (
-                    f"Class '{class_name}' with Data Class characteristics - "
-                    f"LWMC={lwmc}, LCOM={lcom:.2f}, "
-                    f"Attributes={noa}, Methods={nom}, Lines={loc}"
-                )
-            else:
-                smell_type = SmellType.NO_DATA_CLASS.value
-                description = (
-                    f"Class '{class_name}' without Data Class characteristics - "
-                    f"LWMC={lwmc}, LCOM={lcom:.2f}, "
-                    f"Attributes={noa}, Methods={nom}, Lines={loc}"
-                )
+        for file_content, filename in zip(file_contents, file_names):
+            facts = self.ast_analyzer.index_source(file_content, filename)
 
-            smells.append(
-                SmellOccurrence(
-                    id=task_id,
-                    smell_type=smell_type,
-                    description=description,
-                    location=Location(
-                        file_name=filename.replace("\\", "/"),
-                        start_line=start_line,
-                        end_line=start_line + loc - 1
-                    ),
-                    metrics=Metrics(
-                        MLOC=loc,
-                        NOA=noa,
-                        NOM=nom,
-                        LWMC=lwmc,
-                        LCOM=lcom
-                    ),
-                    definition_author="Scylla",
-                    threshold_used=max(lwmc_threshold, lcom_threshold)
+            for class_name, class_facts in facts.classes_by_name().items():
+                start_line = class_facts.start_line
+                loc = class_facts.loc
+
+                noa = class_facts.noa
+                nom = class_facts.nom
+                lwmc = class_facts.lwmc
+                lcom = class_facts.lcom
+
+                if lwmc > lwmc_threshold or lcom > lcom_threshold:
+                    smell_type = SmellType.DATA_CLASS.value
+                    description = (
+                        f"Class '{class_name}' with Data Class characteristics - "
+                        f"LWMC={lwmc}, LCOM={lcom:.2f}, "
+                        f"Attributes={noa}, Methods={nom}, Lines={loc}"
+                    )
+                else:
+                    smell_type = SmellType.NO_DATA_CLASS.value
+                    description = (
+                        f"Class '{class_name}' without Data Class characteristics - "
+                        f"LWMC={lwmc}, LCOM={lcom:.2f}, "
+                        f"Attributes={noa}, Methods={nom}, Lines={loc}"
+                    )
+
+                smells.append(
+                    SmellOccurrence(
+                        id=task_id,
+                        smell_type=smell_type,
+                        description=description,
+                        location=Location(
+                            file_name=self.location_file_name(AnalyseType.data_class, filename),
+                            start_line=start_line,
+                            end_line=start_line + loc - 1
+                        ),
+                        metrics=Metrics(
+                            MLOC=loc,
+                            NOA=noa,
+                            NOM=nom,
+                            LWMC=lwmc,
+                            LCOM=lcom
+                        ),
+                        definition_author="Scylla",
+                        threshold_used=max(lwmc_threshold, lcom_threshold)
+                    )
                 )
-            )
 
         return smells
 
 
     def lazy_class(self, task_id: str, file_contents: Union[str, List[str]], file_names: Union[str, List[str]]) -> List[SmellOccurrence]:
-        
-        if isinstance(file_contents, str):
-            file_contents = [file_contents]
-        if isinstance(file_names, str):
-            file_names = [file_names]
+        file_contents, file_names = self._as_file_lists(file_contents, file_names)
 
         smells: List[SmellOccurrence] = []
 
         for file_content, file_name in zip(file_contents, file_names):
-            noa_stats = self.ast_analyzer.count_attributes(file_content, file_name)
-            nom_stats = self.ast_analyzer.count_methods(file_content, file_name)
-
-            for class_name, metrics in nom_stats.items():
-                nom = metrics["total_methods"]
-                noa = noa_stats.get(class_name, {}).get("total_attributes", 0)
-                dit = self.ast_analyzer.calculate_dit(file_content, file_name, class_name)
-
-                loc = self.ast_analyzer.count_class_loc(file_content, file_name, metrics["start_line"] - 1)
+            facts = self.ast_analyzer.index_source(file_content, file_name)
+            # a repeated class name takes its DIT from the first definition, the others from the last
+            first_dit: Dict[str, int] = {}
+            for class_facts in facts.classes:
+                first_dit.setdefault(class_facts.name, class_facts.dit)
+
+            for class_name, class_facts in facts.classes_by_name().items():
+                nom = class_facts.nom
+                noa = class_facts.noa
+                dit = first_dit[class_name]
+                loc = class_facts.loc
 
                 if (nom < 5 and noa < 5) or dit < 2:
                     smell_type = SmellType.LAZY_CLASS.value
@@ -307,8 +314,8 @@ class Smells:
                         description=description,
                         location=Location(
                             file_name=file_name,
-                            start_line=metrics["start_line"],
-                            end_line=metrics["start_line"] + loc - 1,
+                            start_line=class_facts.start_line,
+                            end_line=class_facts.start_line + loc - 1,
                         ),
                         metrics=Metrics(
                             NOM=nom,
@@ -321,18 +328,27 @@ class Smells:
 
         return smells
 
-    def magic_numbers(self, task_id: str, file_content: str, filename: str) -> List[SmellOccurrence]:
-        MAGIC_NUMBER_EXCEPTIONS = {0.0, 1.0, -1.0}
+    def magic_numbers(self, task_id: str, file_contents: Union[str, List[str]], file_names: Union[str, List[str]]) -> List[SmellOccurrence]:
+        file_contents, file_names = self._as_file_lists(file_contents, file_names)
 
-        tree = self.ast_analyzer.parse_source(file_content, filename)
         smells: List[SmellOccurrence] = []
-        for val, holder, parent in self.ast_analyzer.iter_numeric_literals(tree):
-            if val in MAGIC_NUMBER_EXCEPTIONS:
-                is_magic = False
-            elif self.ast_analyzer.is_constant_assignment(parent) or self.ast_analyzer.is_parameter_default(parent):
-                is_magic = False
-            else:
-                is_magic = True
+        for file_content, filename in zip(file_contents, file_names):
+            smells.extend(self.iter_magic_numbers(task_id, file_content, filename))
+        return smells
+
+    def iter_magic_numbers(self, task_id: str, file_content: str, filename: str, include_non_magic: bool = True) -> Iterator[SmellOccurrence]:
+        """Stream the magic-number occurrences of a file in a single pass over its tree.
+
+        With ``include_non_magic=False`` literals that are not magic are
+        skipped without building an occurrence for them.
+        """
+        MAGIC_NUMBER_EXCEPTIONS = {0.0, 1.0, -1.0}
+
+        facts = self.ast_analyzer.index_source(file_content, filename)
+        for val, holder, exempt in self.ast_analyzer.iter_numeric_literal_contexts(facts.tree):
+            is_magic = not exempt and val not in MAGIC_NUMBER_EXCEPTIONS
+            if not is_magic and not include_non_magic:
+                continue
 
             smell_type = SmellType.MAGIC_NUMBERS.value if is_magic else SmellType.NO_MAGIC_NUMBERS.value
             description = (
@@ -341,35 +357,15 @@ class Smells:
                 else f"Number '{val}' is not considered magic"
             )
 
-            smells.append(
-                SmellOccurrence(
-                    id=task_id,
-                    smell_type=smell_type,
-                    description=description,
-                    location=Location(
-                        file_name=filename,
-                        start_line=getattr(holder, "lineno", 0),
-                        end_line=getattr(holder, "lineno", 0),
-                    ),
-                    metrics=Metrics(),
-                    definition_author="Scylla",
-                )
+            yield SmellOccurrence(
+                id=task_id,
+                smell_type=smell_type,
+                description=description,
+                location=Location(
+                    file_name=filename,
+                    start_line=getattr(holder, "lineno", 0),
+                    end_line=getattr(holder, "lineno", 0),
+                ),
+                metrics=Metrics(),
+                definition_author="Scylla",
             )
-
-        return smells
-
-
-    def _is_valid_magic_number(self, parent_node):
-        if parent_node is None:
-            return True
-
-        
-        if isinstance(parent_node, ast.Assign):
-            return not any(
-                isinstance(target, ast.Name) and target.id.isupper()
-                for target in parent_node.targets
-            )
-
-        
-        return not isinstance(parent_node, ast.arg)
-
@@ -1,7 +1,6 @@
 """Deep Learning classifier for code smell detection."""
 from __future__ import annotations
 
-import json
 import os
 from typing import Any, Dict, List, Tuple
 
@@ -9,8 +8,9 @@ import numpy as np
 from application.dtos.enums.dl_model import DLModel
 from domain.entities.dl_classification import DLClassification
 from infrastructure.config.settings import settings
+from infrastructure.service.schedule.inference_queue import dl_inference_queue, split_by_sizes
 
-from .keras3_loader import load_keras3_model
+from .model_server import dl_model_server
 
 
 class DLClassifier:
@@ -24,11 +24,22 @@ class DLClassifier:
         'hal_func_N2',
     ]
 
-    def __init__(self) -> None:
-        """Initialize the DL classifier by loading the model."""
-        self.dl_model = load_keras3_model(settings.dl_model)
-        self.model_labels = self._load_labels(settings.dl_model)
-        print(f'[OK] DL model loaded from {settings.dl_model}')
+    # bump whenever the features or the prediction code change, so stored results are not reused
+    VERSION = "1"
+
+    def __init__(self, server=dl_model_server, batch_size: int = settings.dl_batch_size) -> None:
+        """Initialize the DL classifier on the shared model server; the model loads on first use."""
+        self.server = server
+        self.batch_size = max(1, batch_size)
+
+    @property
+    def model_labels(self) -> List[str]:
+        return self.server.labels
+
+    def model_version(self) -> str:
+        """Version of the results: this code, the model and label files and the engine running them."""
+        # the server reloads the model when this fingerprint changes, so results never outlive their model
+        return f"{self.VERSION}-{self.server.fingerprint()}"
 
     def classify_methods(
         self,
@@ -62,14 +73,22 @@ class DLClassifier:
 
         print(f"[DL Classifier] Classifying {total} {element_type}(s)...")
 
-        for idx, result in enumerate(extraction_results, 1):
-            metrics = result.get('code_metric', {}) or {}
-            features = self._prepare_features(metrics)
-            label, confidence = self._predict(features)
-
-            if idx % 10 == 0 or idx == total:
-                print(f"[DL Classifier] Progress: {idx}/{total} {element_type}(s) classified")
-
+        all_metrics = [result.get('code_metric', {}) or {} for result in extraction_results]
+        features = np.array(
+            [[self._prepare_features(metrics)[key] for key in self.FEATURE_ORDER] for metrics in all_metrics],
+            dtype=np.float32,
+        ).reshape(-1, len(self.FEATURE_ORDER))
+
+        labels: List[str] = []
+        confidences: List[float] = []
+        # one forward pass per chunk instead of per element, bounded so huge tasks do not hold every activation at once
+        for start in range(0, total, self.batch_size):
+            chunk_labels, chunk_confidences = self._predict_batch(features[start:start + self.batch_size])
+            labels.extend(chunk_labels)
+            confidences.extend(chunk_confidences)
+            print(f"[DL Classifier] Progress: {len(labels)}/{total} {element_type}(s) classified")
+
+        for result, metrics, label, confidence in zip(extraction_results, all_metrics, labels, confidences):
             classifications.append(
                 DLClassification(
                     id=task_id,
@@ -97,28 +116,33 @@ class DLClassifier:
             'hal_func_N2': float(metrics.get('hal_func_N2', metrics.get('N2', metrics.get('n2', 0)))),
         }
 
-    def _predict(self, features: Dict[str, float]) -> Tuple[str, float]:
-        """Make prediction using the DL model."""
-        vector = [features[key] for key in self.FEATURE_ORDER]
-        data = np.array([vector], dtype=float)
-
-        predictions = self.dl_model.predict(data, verbose=0)
-        probabilities = predictions[0]
+    def _predict_batch(self, data: np.ndarray) -> Tuple[List[str], List[float]]:
+        """Labels and confidences of the feature rows of ``data`` from one forward pass."""
+        probabilities = dl_inference_queue.submit(self.server.model_path, data, len(data), self._predict_arrays)
 
-        if not (0.99 <= probabilities.sum() <= 1.01):
-            exp_preds = np.exp(probabilities - np.max(probabilities))
-            probabilities = exp_preds / exp_preds.sum()
+        # rows the model did not already normalize get a softmax
+        sums = probabilities.sum(axis=1)
+        unnormalized = (sums < 0.99) | (sums > 1.01)
+        if unnormalized.any():
+            logits = probabilities[unnormalized]
+            exp_preds = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probabilities = probabilities.copy()
+            probabilities[unnormalized] = exp_preds / exp_preds.sum(axis=1, keepdims=True)
 
-        label_index = int(np.argmax(probabilities))
-        confidence = float(probabilities[label_index])
-        label = self._get_label(label_index)
+        label_indexes = probabilities.argmax(axis=1)
+        confidences = probabilities[np.arange(len(label_indexes)), label_indexes]
 
-        if not hasattr(self, '_low_confidence_warned') and confidence < 0.5:
-            print(f"[WARN] Low confidence prediction detected ({confidence:.2%}). "
+        if not hasattr(self, '_low_confidence_warned') and len(confidences) and confidences.min() < 0.5:
+            print(f"[WARN] Low confidence prediction detected ({float(confidences.min()):.2%}). "
                   f"This may indicate the model needs retraining with more data or better features.")
             self._low_confidence_warned = True
 
-        return label, confidence
+        return [self._get_label(int(index)) for index in label_indexes], [float(confidence) for confidence in confidences]
+
+    def _predict_arrays(self, arrays: List[np.ndarray]) -> List[np.ndarray]:
+        """Model outputs of each feature matrix in ``arrays``, from one forward pass over all of them."""
+        probabilities = np.asarray(self.server.predict(np.concatenate(arrays)))
+        return split_by_sizes(probabilities, [len(array) for array in arrays])
 
     def _get_element_name(self, result: Dict[str, Any], element_type: str) -> str:
         """Extract element name from result."""
@@ -145,19 +169,3 @@ class DLClassifier:
             raise FileNotFoundError(f'DL model not found at: {model_path}')
 
         return model_path
-
-    def _load_labels(self, model_path: str) -> List[str]:
-        """Load label names from labels.json file."""
-        model_dir = os.path.dirname(model_path)
-        labels_path = os.path.join(model_dir, 'labels.json')
-
-        if os.path.exists(labels_path):
-            try:
-                with open(labels_path, 'r', encoding='utf-8') as f:
-                    labels = json.load(f)
-                    if isinstance(labels, list):
-                        return labels
-            except Exception as e:
-                print(f'[WARN] Failed to load labels from {labels_path}: {e}')
-
-        return ['long-method', 'long-parameter-list', 'non-long-method', 'non-long-parameter-list']
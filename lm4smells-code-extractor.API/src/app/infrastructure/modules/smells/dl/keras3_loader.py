@@ -4,14 +4,19 @@ This module handles the complexity of loading Keras 3.x models in Keras 2.x/Tens
 """
 from __future__ import annotations
 
+import io
 import json
 import os
 import tempfile
 import zipfile
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
+import numpy as np
 import tensorflow as tf
 
+# the NumPy export reads the archive directly and needs no TensorFlow; re-exported for callers of this loader
+from .numpy_model import compile_keras_archive, export_numpy_bundle  # noqa: F401
+
 
 @tf.keras.utils.register_keras_serializable(package="Custom", name="CastToFloat32")
 class CastToFloat32Layer(tf.keras.layers.Layer):
@@ -40,6 +45,11 @@ def load_keras3_model(model_path: str) -> tf.keras.Model:
     Raises:
         RuntimeError: If model loading fails
     """
+    from infrastructure.service.storage.model_cache import model_cache
+
+    if model_cache.enabled and model_path.lower().endswith('.keras') and zipfile.is_zipfile(model_path):
+        return _load_from_model_cache(model_path)
+
     try:
         # First, try standard loading
         return tf.keras.models.load_model(
@@ -91,6 +101,47 @@ def _load_from_keras3_archive(archive_path: str) -> tf.keras.Model:
     return model
 
 
+def _load_from_model_cache(archive_path: str) -> tf.keras.Model:
+    """Build the model from its cached config and memory-mapped weights, compiling them on the first load."""
+    from infrastructure.service.storage.model_cache import model_cache
+
+    # its own entry: the NumPy engine's one only holds the layer chains it can run
+    metadata, arrays = model_cache.get_arrays('keras', archive_path, lambda: _read_keras_archive(archive_path))
+    model = _build_model_from_config(metadata['config'])
+
+    for layer in model.layers:
+        weight_values = [arrays[f'{layer.name}/{i}'] for i in range(len(layer.weights)) if f'{layer.name}/{i}' in arrays]
+        if weight_values:
+            try:
+                layer.set_weights(weight_values)
+            except ValueError as exc:
+                raise RuntimeError(f"Cannot set the cached weights of layer {layer.name}: {exc}") from exc
+
+    return model
+
+
+def _read_keras_archive(archive_path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """The config of a ``.keras`` archive as metadata, plus the weights of every layer by ``<layer>/<index>``."""
+    import h5py
+
+    try:
+        with zipfile.ZipFile(archive_path, 'r') as archive:
+            config = json.loads(archive.read('config.json').decode('utf-8'))
+            weights_bytes = archive.read('model.weights.h5')
+    except KeyError as exc:
+        raise RuntimeError(f'Invalid Keras archive: missing {exc}') from exc
+
+    arrays: Dict[str, np.ndarray] = {}
+    with h5py.File(io.BytesIO(weights_bytes), 'r') as h5_file:
+        layers_group = h5_file['layers'] if 'layers' in h5_file else {}
+        for name in layers_group:
+            vars_group = layers_group[name]['vars'] if 'vars' in layers_group[name] else {}
+            for i in range(len(vars_group)):
+                arrays[f'{name}/{i}'] = np.asarray(vars_group[str(i)][()])
+
+    return {'config': config}, arrays
+
+
 def _build_model_from_config(config: Dict[str, Any]) -> tf.keras.Model:
     """Build Keras model from configuration."""
     layers_config = config.get('config', {}).get('layers', [])
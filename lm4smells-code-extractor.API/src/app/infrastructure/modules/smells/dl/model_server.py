@@ -0,0 +1,159 @@
+"""Process-wide owner of the DL model, shared by every DL task."""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from infrastructure.config.settings import settings
+from infrastructure.service.storage.result_store import file_fingerprint
+
+DEFAULT_LABELS = ['long-method', 'long-parameter-list', 'non-long-method', 'non-long-parameter-list']
+
+
+def load_labels(model_path: str) -> List[str]:
+    """Load label names from the labels.json file next to the model."""
+    labels_path = os.path.join(os.path.dirname(model_path), 'labels.json')
+
+    if os.path.exists(labels_path):
+        try:
+            with open(labels_path, 'r', encoding='utf-8') as f:
+                labels = json.load(f)
+                if isinstance(labels, list):
+                    return labels
+        except Exception as e:
+            print(f'[WARN] Failed to load labels from {labels_path}: {e}')
+
+    return DEFAULT_LABELS
+
+
+class DLModelServer:
+    """Loads the DL model once per process and serves its predictions.
+
+    The first task that needs the model loads it; tasks arriving meanwhile
+    wait for that load instead of building their own copy. The model is
+    only used for inference afterwards, so every task shares it. A failed
+    load is reported by :meth:`status` and retried by the next task.
+    When the model or label file changes on disk (see :meth:`fingerprint`,
+    also part of the result version) the next task loads it again.
+
+    The readiness state goes ``idle`` -> ``loading`` -> ``ready``, or
+    ``failed`` when the load raised. With ``dl_use_numpy_engine`` the
+    model runs as its NumPy bundle (see ``numpy_model``) and TensorFlow is
+    never imported.
+    """
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.state = "idle"
+        self.error: Optional[str] = None
+
+        self._model: Any = None
+        self._fingerprint: Optional[str] = None
+        self._labels: List[str] = []
+        self._load_lock = threading.Lock()
+        self._predict_lock = threading.Lock()
+        self._load_seconds = 0.0
+        self._loaded_at: Optional[float] = None
+        self._counters = {"loads": 0, "reloads": 0, "load_failures": 0, "predict_calls": 0, "rows": 0}
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    @property
+    def labels(self) -> List[str]:
+        self.ensure_loaded()
+        return self._labels
+
+    def fingerprint(self) -> str:
+        """Fingerprint of the model and label files and of the engine running them."""
+        labels_path = os.path.join(os.path.dirname(self.model_path), 'labels.json')
+        return f"{file_fingerprint(self.model_path)}-{file_fingerprint(labels_path)}-{self.engine}"
+
+    def ensure_loaded(self) -> Any:
+        """The model, loading it on the first call and when its files change; raises when it cannot be loaded."""
+        fingerprint = self.fingerprint()
+        if self._model is not None and self._fingerprint == fingerprint:
+            return self._model
+
+        with self._load_lock:
+            # another task may have loaded it while this one waited
+            if self._model is not None and self._fingerprint == fingerprint:
+                return self._model
+            if self._model is not None:
+                self._counters["reloads"] += 1
+                print(f"[INFO] DL model {self.model_path} changed on disk, loading it again")
+
+            self.state = "loading"
+            started = time.perf_counter()
+            try:
+                model = self._load_model()
+                labels = load_labels(self.model_path)
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                self._counters["load_failures"] += 1
+                raise
+
+            self._load_seconds = time.perf_counter() - started
+            self._loaded_at = time.time()
+            self._labels = labels
+            self._model = model
+            self._fingerprint = fingerprint
+            self._counters["loads"] += 1
+            self.state = "ready"
+            self.error = None
+
+        print(f"[OK] DL model loaded from {self.model_path} ({self.engine}) in {self._load_seconds:.2f}s")
+        return self._model
+
+    @property
+    def engine(self) -> str:
+        return "numpy" if settings.dl_use_numpy_engine else "keras"
+
+    def _load_model(self) -> Any:
+        if self.engine == "numpy":
+            from .numpy_model import load_numpy_model
+            return load_numpy_model(self.model_path)
+        # imported on first load, so processes that never classify with DL skip TensorFlow
+        from .keras3_loader import load_keras3_model
+        return load_keras3_model(self.model_path)
+
+    def warm_up(self) -> bool:
+        """Load the model ahead of the first task; returns whether it is ready."""
+        try:
+            self.ensure_loaded()
+        except Exception as e:
+            print(f"[WARN] Could not preload DL model {self.model_path}: {e}")
+        return self.ready
+
+    def predict(self, data: np.ndarray) -> np.ndarray:
+        """Raw model outputs for the rows of ``data``."""
+        model = self.ensure_loaded()
+        # Keras builds its predict function on the first call; one forward pass at a time keeps that safe
+        with self._predict_lock:
+            self._counters["predict_calls"] += 1
+            self._counters["rows"] += len(data)
+            # the caller already bounds the batch; Keras would otherwise split it into steps of 32
+            return model.predict(data, batch_size=max(1, len(data)), verbose=0)
+
+    def status(self) -> Dict:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "error": self.error,
+            "model": os.path.basename(self.model_path),
+            "engine": self.engine,
+            "labels": self._labels,
+            "load_seconds": self._load_seconds,
+            "loaded_at": self._loaded_at,
+            **self._counters,
+        }
+
+
+dl_model_server = DLModelServer(settings.dl_model)
@@ -0,0 +1,316 @@
+"""NumPy forward pass for the dense DL model, without TensorFlow.
+
+The ``.keras`` archive's layer config and ``model.weights.h5`` are exported
+once into a ``.npz`` weight bundle next to the archive; :class:`NumpyModel`
+runs it with plain NumPy. Only the layers of a feed-forward chain are
+supported: InputLayer, the custom CastToFloat32, Dense, BatchNormalization
+(last axis), ReLU, Activation, Softmax and Dropout (a no-op at inference).
+
+Export the configured model and compare the bundle with the Keras model,
+from the ``app`` folder (the comparison needs TensorFlow):
+
+    python -m infrastructure.modules.smells.dl.numpy_model [path ...] [--limit N]
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import io
+import json
+import os
+import sysconfig
+import zipfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+BUNDLE_FORMAT = "1"
+
+
+def bundle_path(archive_path: str) -> str:
+    return f"{os.path.splitext(archive_path)[0]}.numpy.npz"
+
+
+def archive_digest(archive_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(archive_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _softmax(x: np.ndarray, axis: int = -1) -> np.ndarray:
+    exp = np.exp(x - x.max(axis=axis, keepdims=True))
+    return exp / exp.sum(axis=axis, keepdims=True)
+
+
+def _relu(x: np.ndarray, negative_slope: float = 0.0, max_value: Optional[float] = None, threshold: float = 0.0) -> np.ndarray:
+    out = np.where(x >= threshold, x, negative_slope * (x - threshold)).astype(x.dtype, copy=False)
+    return out if max_value is None else np.minimum(out, np.float32(max_value))
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": _relu,
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+    "tanh": np.tanh,
+    "softmax": _softmax,
+}
+
+
+def _activation(name: str):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation in the DL model: {name}")
+    return ACTIVATIONS[name]
+
+
+class NumpyModel:
+    """A chain of layers run with NumPy, predicting like the Keras model it was exported from."""
+
+    def __init__(self, layers: List[Dict[str, Any]], weights: Dict[str, np.ndarray], source_digest: str = ""):
+        self.layers = layers
+        self.source_digest = source_digest
+        self.input_width: Optional[int] = None
+        self._steps = [self._compile(layer, weights) for layer in layers]
+
+    def predict(self, data, batch_size: Optional[int] = None, verbose: int = 0) -> np.ndarray:
+        x = np.asarray(data)
+        for step in self._steps:
+            x = step(x)
+        return x
+
+    def _compile(self, layer: Dict[str, Any], weights: Dict[str, np.ndarray]):
+        kind, name, config = layer["class_name"], layer["name"], layer.get("config", {})
+        variables = [weights[f"{name}/{i}"] for i in range(layer.get("vars", 0))]
+
+        if kind == "InputLayer":
+            shape = config.get("batch_shape") or [None, None]
+            self.input_width = shape[-1]
+            return lambda x: x
+        if kind == "CastToFloat32":
+            return lambda x: x.astype(np.float32, copy=False)
+        if kind == "Dropout":
+            return lambda x: x
+        if kind == "Dense":
+            kernel = variables[0]
+            bias = variables[1] if config.get("use_bias", True) else None
+            activation = _activation(config.get("activation", "linear"))
+            return lambda x: activation(x @ kernel + bias if bias is not None else x @ kernel)
+        if kind == "BatchNormalization":
+            if config.get("axis", -1) not in (-1, [-1]):
+                raise ValueError(f"Unsupported BatchNormalization axis in layer {name}: {config.get('axis')}")
+            variables = list(variables)
+            gamma = variables.pop(0) if config.get("scale", True) else None
+            beta = variables.pop(0) if config.get("center", True) else None
+            mean, variance = variables
+            # inference-time normalization folded into one scale and shift
+            scale = (1.0 / np.sqrt(variance + np.float32(config.get("epsilon", 1e-3)))).astype(np.float32)
+            if gamma is not None:
+                scale = scale * gamma
+            shift = -mean * scale
+            if beta is not None:
+                shift = shift + beta
+            return lambda x: x * scale + shift
+        if kind == "ReLU":
+            return lambda x: _relu(
+                x,
+                negative_slope=np.float32(config.get("negative_slope", 0.0)),
+                max_value=config.get("max_value"),
+                threshold=np.float32(config.get("threshold", 0.0)),
+            )
+        if kind == "Activation":
+            return _activation(config.get("activation", "linear"))
+        if kind == "Softmax":
+            axis = config.get("axis", -1)
+            return lambda x: _softmax(x, axis=axis)
+        raise ValueError(f"Unsupported layer in the DL model: {kind} ({name})")
+
+
+def export_numpy_bundle(archive_path: str, target: Optional[str] = None) -> str:
+    """Write the layer chain and weights of a ``.keras`` archive as a NumPy bundle; returns its path."""
+    _, layers, arrays = read_keras_archive(archive_path)
+    # fails here, not at serving time, on a layer the engine cannot run
+    NumpyModel(layers, arrays)
+
+    target = target or bundle_path(archive_path)
+    np.savez(
+        target,
+        __layers__=np.array(json.dumps(layers)),
+        __source__=np.array(archive_digest(archive_path)),
+        __format__=np.array(BUNDLE_FORMAT),
+        **arrays,
+    )
+    return target
+
+
+def read_keras_archive(archive_path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]], Dict[str, np.ndarray]]:
+    """The model config of a ``.keras`` archive, its layer chain and its weights, by ``<layer>/<index>``."""
+    import h5py
+
+    try:
+        with zipfile.ZipFile(archive_path, "r") as archive:
+            config = json.loads(archive.read("config.json").decode("utf-8"))
+            weights_bytes = archive.read("model.weights.h5")
+    except KeyError as exc:
+        raise ValueError(f"Invalid Keras archive: missing {exc}") from exc
+
+    layers_config = config.get("config", {}).get("layers", [])
+    if not layers_config:
+        raise ValueError("No layers found in model config")
+
+    layers: List[Dict[str, Any]] = []
+    arrays: Dict[str, np.ndarray] = {}
+    previous = None
+    with h5py.File(io.BytesIO(weights_bytes), "r") as h5_file:
+        stored = h5_file["layers"] if "layers" in h5_file else {}
+        for layer_data in layers_config:
+            name = layer_data["name"]
+            _check_chain(layer_data, previous)
+            previous = name
+
+            variables = stored[name]["vars"] if name in stored and "vars" in stored[name] else {}
+            for i in range(len(variables)):
+                arrays[f"{name}/{i}"] = np.asarray(variables[str(i)][()], dtype=np.float32)
+            layers.append({
+                "class_name": layer_data["class_name"],
+                "name": name,
+                "config": _plain_config(layer_data.get("config", {})),
+                "vars": len(variables),
+            })
+    return config, layers, arrays
+
+
+def compile_keras_archive(archive_path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """What the model cache keeps of an archive: config and layer chain as metadata, plus the weights."""
+    config, layers, arrays = read_keras_archive(archive_path)
+    NumpyModel(layers, arrays)
+    return {"config": config, "layers": layers}, arrays
+
+
+def load_numpy_bundle(path: str) -> NumpyModel:
+    with np.load(path, allow_pickle=False) as bundle:
+        if str(bundle["__format__"]) != BUNDLE_FORMAT:
+            raise ValueError(f"Unsupported NumPy bundle format in {path}: {bundle['__format__']}")
+        layers = json.loads(str(bundle["__layers__"]))
+        weights = {key: bundle[key] for key in bundle.files if not key.startswith("__")}
+        return NumpyModel(layers, weights, source_digest=str(bundle["__source__"]))
+
+
+def load_numpy_model(archive_path: str) -> NumpyModel:
+    """The NumPy model of ``archive_path``, from the model cache when enabled, else from its bundle.
+
+    The bundle is exported first when it is missing or stale.
+    """
+    from infrastructure.service.storage.model_cache import model_cache
+
+    digest = archive_digest(archive_path)
+    if model_cache.enabled:
+        metadata, arrays = model_cache.get_arrays("dl", archive_path, lambda: compile_keras_archive(archive_path))
+        return NumpyModel(metadata["layers"], arrays, source_digest=digest)
+
+    path = bundle_path(archive_path)
+    if os.path.isfile(path):
+        model = load_numpy_bundle(path)
+        if model.source_digest == digest:
+            return model
+        print(f"[INFO] NumPy bundle {path} is stale, exporting it again")
+    try:
+        export_numpy_bundle(archive_path, path)
+    except OSError as e:
+        # e.g. a read-only model folder: run from the archive, exporting again on the next start
+        print(f"[WARN] Could not write the NumPy bundle {path}: {e}")
+        _, layers, arrays = read_keras_archive(archive_path)
+        return NumpyModel(layers, arrays, source_digest=digest)
+    return load_numpy_bundle(path)
+
+
+def _check_chain(layer_data: Dict[str, Any], previous: Optional[str]) -> None:
+    """Raise unless the layer reads the output of the one before it (or is the input)."""
+    inbound = json.dumps(layer_data.get("inbound_nodes", []))
+    if previous is None:
+        if layer_data.get("class_name") != "InputLayer":
+            raise ValueError("The DL model does not start with an InputLayer")
+    elif f'"{previous}"' not in inbound or inbound.count('"keras_history"') != 1:
+        raise ValueError(f"Layer {layer_data.get('name')} is not fed by {previous} alone; only layer chains are supported")
+
+
+def _plain_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """The layer options the engine reads, without Keras' serialized objects."""
+    return {key: value for key, value in config.items() if not isinstance(value, dict)}
+
+
+def check_parity(archive_path: str, data: np.ndarray, atol: float = 1e-3) -> float:
+    """Largest difference between the Keras and NumPy outputs on ``data``.
+
+    Raises ``ValueError`` when a label differs or a probability differs by
+    more than ``atol``. Both run in float32 with different summation orders,
+    so logits in the tens of thousands (huge methods) can differ by an ulp,
+    which the softmax turns into differences around 1e-4.
+    """
+    from .keras3_loader import load_keras3_model
+
+    expected = np.asarray(load_keras3_model(archive_path).predict(data, batch_size=max(1, len(data)), verbose=0))
+    actual = load_numpy_model(archive_path).predict(data)
+    difference = float(np.max(np.abs(expected - actual))) if len(data) else 0.0
+    if difference > atol or not np.array_equal(expected.argmax(axis=1), actual.argmax(axis=1)):
+        raise ValueError(f"NumPy outputs differ from Keras by up to {difference:.2e}")
+    return difference
+
+
+def _parity_data(paths: List[str], limit: int) -> np.ndarray:
+    from application.dtos.request.dl_operation_input import DLOperationInput
+    from infrastructure.service.extract_codes.method_extractor import MethodExtractor
+
+    from .dl_classifier import DLClassifier
+
+    code_files = []
+    for path in paths:
+        files = [path] if os.path.isfile(path) else (
+            os.path.join(root, name)
+            for root, _, names in sorted(os.walk(path))
+            for name in sorted(names)
+            if name.endswith(".py")
+        )
+        for file_path in files:
+            try:
+                with open(file_path, encoding="utf-8") as f:
+                    source = f.read()
+                ast.parse(source)
+            except (SyntaxError, UnicodeDecodeError, ValueError):
+                continue
+            code_files.append({"programming_language": "python", "file_name": file_path, "code": source})
+            if len(code_files) >= limit:
+                break
+
+    results = MethodExtractor().extract(code_files, DLOperationInput.metric_families)
+    DLOperationInput.map_metrics_to_dl_input(results)
+    classifier = DLClassifier()
+    extracted = [
+        [classifier._prepare_features(result.get("code_metric", {}) or {})[key] for key in DLClassifier.FEATURE_ORDER]
+        for result in results
+    ]
+    # plus random rows well outside the usual ranges
+    rng = np.random.default_rng(0)
+    random = rng.uniform(0.0, 5000.0, size=(256, len(DLClassifier.FEATURE_ORDER)))
+    return np.vstack([np.asarray(extracted, dtype=np.float32).reshape(-1, len(DLClassifier.FEATURE_ORDER)), random]).astype(np.float32)
+
+
+def main():
+    from infrastructure.config.settings import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=[sysconfig.get_paths()["stdlib"]])
+    parser.add_argument("--limit", type=int, default=50, help="Number of files the parity data is extracted from.")
+    args = parser.parse_args()
+
+    path = export_numpy_bundle(settings.dl_model)
+    print(f"[INFO] DL model exported to {path}")
+
+    data = _parity_data(args.paths, args.limit)
+    difference = check_parity(settings.dl_model, data)
+    print(f"[INFO] {len(data)} rows checked against Keras, largest difference {difference:.2e}")
+
+
+if __name__ == "__main__":
+    main()
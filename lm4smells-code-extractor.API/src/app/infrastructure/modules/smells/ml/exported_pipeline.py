@@ -0,0 +1,288 @@
+"""Plain sklearn inference artifacts exported from the pycaret pipelines.
+
+A pycaret pipeline wraps every preprocessing step in its own
+``TransformerWrapper`` and needs ``pycaret`` to be unpickled. The exported
+artifact keeps the same fitted sklearn transformers and estimator, plus the
+column plumbing the wrappers perform (measured on a probe frame at export
+time), so it only needs sklearn, LightGBM, numpy and pandas to predict.
+
+Export every configured model from the ``app`` folder, in an environment
+with pycaret installed:
+
+    python -m infrastructure.modules.smells.ml.exported_pipeline [path ...] [--limit N]
+
+Each artifact is written next to its model as ``<model>.inference.joblib``
+only after it gave the same labels and scores as ``predict_model`` on the
+methods and classes extracted from the given paths (the standard library
+by default).
+"""
+import argparse
+import ast
+import os
+import sysconfig
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ARTIFACT_SUFFIX = ".inference.joblib"
+
+# pycaret's predict_model rounds the prediction score to this many decimals
+SCORE_DECIMALS = 4
+
+
+def exported_path(model_path: str) -> str:
+    return f"{model_path}{ARTIFACT_SUFFIX}"
+
+
+def pycaret_path(model_path: str) -> str:
+    return model_path if model_path.endswith(".pkl") else f"{model_path}.pkl"
+
+
+def has_fresh_export(model_path: str) -> bool:
+    """Whether an exported artifact exists and is not older than the pycaret model."""
+    artifact = exported_path(model_path)
+    if not os.path.isfile(artifact):
+        return False
+    source = pycaret_path(model_path)
+    return not os.path.isfile(source) or os.path.getmtime(artifact) >= os.path.getmtime(source)
+
+
+@dataclass
+class ExportedStep:
+    name: str
+    transformer: Any                   # None when the step only selects or reorders columns
+    selected: List[str]                # columns given to the transformer
+    columns: List[str]                 # columns coming out of the step
+    sources: List[Tuple[bool, Any]]    # per output column: (from the transformer, its index) or (False, input name)
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        output = None
+        if self.transformer is not None:
+            output = self.transformer.transform(X[self.selected])
+            output = output.to_numpy() if isinstance(output, pd.DataFrame) else np.asarray(output)
+
+        return pd.DataFrame(
+            {
+                name: output[:, ref] if from_transformer else X[ref].to_numpy()
+                for name, (from_transformer, ref) in zip(self.columns, self.sources)
+            },
+            index=X.index,
+        )
+
+
+@dataclass
+class ExportedPipeline:
+    """Preprocessing steps, fitted estimator and label decoding of a pycaret pipeline."""
+
+    feature_names: Optional[List[str]]
+    steps: List[ExportedStep]
+    estimator: Any
+    label_encoder: Any = None
+
+    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        X = data[self.feature_names] if self.feature_names else data
+        for step in self.steps:
+            X = step.transform(X)
+        return X
+
+    def predict(self, data: pd.DataFrame) -> np.ndarray:
+        return self._decode(self.estimator.predict(self.transform(data)))
+
+    def predict_with_scores(self, data: pd.DataFrame) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Labels and, when the estimator has probabilities, the ``prediction_score`` pycaret would give."""
+        X = self.transform(data)
+        encoded = self.estimator.predict(X)
+        if not hasattr(self.estimator, "predict_proba"):
+            return self._decode(encoded), None
+
+        probabilities = self.estimator.predict_proba(X)
+        # pycaret reports the probability of the predicted class
+        class_index = np.searchsorted(self.estimator.classes_, encoded)
+        scores = probabilities[np.arange(len(encoded)), class_index]
+        return self._decode(encoded), np.round(scores, SCORE_DECIMALS)
+
+    def decision_function(self, data: pd.DataFrame) -> np.ndarray:
+        return self.estimator.decision_function(self.transform(data))
+
+    def _decode(self, encoded: np.ndarray) -> np.ndarray:
+        if self.label_encoder is None:
+            return np.asarray(encoded)
+        return self.label_encoder.inverse_transform(np.asarray(encoded).astype(int))
+
+
+def load_exported(model_path: str) -> ExportedPipeline:
+    import joblib
+    return joblib.load(exported_path(model_path))
+
+
+def export_pipeline(pipeline, rows: int = 64, seed: int = 0) -> ExportedPipeline:
+    """Rebuild ``pipeline`` as an :class:`ExportedPipeline`.
+
+    Every step is run on a random probe frame to learn which columns it
+    reads and where each output column comes from. Raises ``ValueError``
+    for a step that only pycaret could run.
+    """
+    feature_names = [str(name) for name in getattr(pipeline, "feature_names_in_", [])] or None
+    if feature_names is None:
+        raise ValueError("The pipeline does not record the feature names it was fitted on")
+
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.uniform(1.0, 100.0, size=(rows, len(feature_names))), columns=feature_names)
+
+    steps: List[ExportedStep] = []
+    label_encoder = None
+    for name, wrapper in pipeline.steps[:-1]:
+        if getattr(wrapper, "_train_only", False):
+            continue   # resampling and the like never run at prediction time
+        if name == "label_encoding":
+            label_encoder = wrapper.transformer
+            continue
+
+        output = wrapper.transform(X)
+        if isinstance(output, tuple):
+            output = output[0]
+        # not skipped when the probe comes out unchanged: an imputer leaves a frame without gaps as it is
+        steps.append(_export_step(name, wrapper, X, output))
+        X = output
+
+    estimator = pipeline.steps[-1][1]
+    if type(estimator).__module__.startswith("pycaret"):
+        raise ValueError(f"The estimator {type(estimator).__name__} is a pycaret class")
+    return ExportedPipeline(feature_names, steps, estimator, label_encoder)
+
+
+def _export_step(name: str, wrapper, X: pd.DataFrame, output: pd.DataFrame) -> ExportedStep:
+    transformer = wrapper.transformer
+    # the wrapper settles the columns it transforms on its first call; an empty list means none
+    selected = getattr(wrapper, "_include", None)
+    selected = list(X.columns) if selected is None else [str(column) for column in selected]
+    columns = [str(column) for column in output.columns]
+    if not selected:
+        return ExportedStep(name, None, [], columns, [(False, column) for column in columns])
+
+    if type(transformer).__module__.startswith("pycaret"):
+        # only column selectors (e.g. multicollinearity removal) can go without their transformer
+        for column in columns:
+            if column not in X.columns or not np.array_equal(X[column].to_numpy(), output[column].to_numpy(), equal_nan=True):
+                raise ValueError(f"Step {name} ({type(transformer).__name__}) computes new values and needs pycaret")
+        return ExportedStep(name, None, [], columns, [(False, column) for column in columns])
+
+    raw = transformer.transform(X[selected])
+    names = list(raw.columns) if isinstance(raw, pd.DataFrame) else None
+    raw = raw.to_numpy() if isinstance(raw, pd.DataFrame) else np.asarray(raw)
+    if names is None and hasattr(transformer, "get_feature_names_out"):
+        names = [str(feature) for feature in transformer.get_feature_names_out()]
+    if names is None and raw.shape[1] == len(selected):
+        names = selected
+
+    sources: List[Tuple[bool, Any]] = []
+    for column in columns:
+        if column not in selected and column in X.columns:
+            sources.append((False, column))
+            continue
+        index = names.index(column) if names and column in names else _matching_column(raw, output[column].to_numpy())
+        if index is None:
+            raise ValueError(f"Cannot tell where column {column} of step {name} comes from")
+        sources.append((True, index))
+
+    uses_transformer = any(from_transformer for from_transformer, _ in sources)
+    return ExportedStep(name, transformer if uses_transformer else None, selected if uses_transformer else [], columns, sources)
+
+
+def _matching_column(raw: np.ndarray, values: np.ndarray) -> Optional[int]:
+    matches = [j for j in range(raw.shape[1]) if np.allclose(raw[:, j], values, equal_nan=True)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def check_parity(pipeline, exported: ExportedPipeline, data: pd.DataFrame) -> None:
+    """Raise ``ValueError`` unless ``exported`` gives pycaret's labels and scores on ``data``."""
+    from pycaret.classification import predict_model
+
+    expected = predict_model(pipeline, data=data, verbose=False)
+    labels, scores = exported.predict_with_scores(data)
+
+    mismatches = int(np.sum(expected["prediction_label"].astype(str).to_numpy() != labels.astype(str)))
+    if mismatches:
+        raise ValueError(f"{mismatches} of {len(data)} labels differ from pycaret")
+
+    if "prediction_score" in expected.columns:
+        if scores is None or not np.allclose(expected["prediction_score"].to_numpy(dtype=float), scores):
+            raise ValueError("Prediction scores differ from pycaret")
+    elif hasattr(exported.estimator, "decision_function"):
+        if not np.allclose(pipeline.decision_function(data), exported.decision_function(data)):
+            raise ValueError("Decision function differs from pycaret")
+
+
+def _parity_data(paths: List[str], limit: int, analyse_type: str) -> pd.DataFrame:
+    from application.dtos.request.ml_operation_input import MLOperationInput
+    from infrastructure.service.extract_codes.class_extractor import ClassExtractor
+    from infrastructure.service.extract_codes.method_extractor import MethodExtractor
+
+    code_files = []
+    for path in paths:
+        files = [path] if os.path.isfile(path) else (
+            os.path.join(root, name)
+            for root, _, names in sorted(os.walk(path))
+            for name in sorted(names)
+            if name.endswith(".py")
+        )
+        for file_path in files:
+            try:
+                with open(file_path, encoding="utf-8") as f:
+                    source = f.read()
+                ast.parse(source)
+            except (SyntaxError, UnicodeDecodeError, ValueError):
+                continue
+            code_files.append({"programming_language": "python", "file_name": file_path, "code": source})
+            if len(code_files) >= limit:
+                break
+
+    extractor = ClassExtractor() if analyse_type == "large-class" else MethodExtractor()
+    results = extractor.extract(code_files, MLOperationInput.metric_families)
+    MLOperationInput.map_metrics_to_ml_input(results)
+    return pd.DataFrame([result.get("code_metric", {}) or {} for result in results])
+
+
+def main():
+    import joblib
+    from pycaret.classification import load_model
+
+    from application.dtos.enums.ml_model import ML_MODEL_SETTINGS
+    from infrastructure.modules.smells.ml.ml_classifier import MLClassifier
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=[sysconfig.get_paths()["stdlib"]])
+    parser.add_argument("--limit", type=int, default=50, help="Number of files the parity data is extracted from.")
+    args = parser.parse_args()
+
+    classifier = MLClassifier()
+    failed = 0
+    for analyse_type, models in ML_MODEL_SETTINGS.items():
+        data = _parity_data(args.paths, args.limit, analyse_type)
+        for ml_model in models:
+            model_path = classifier._choose_models(analyse_type, ml_model)
+            label = f"{analyse_type}:{ml_model.value}"
+            if not model_path or not os.path.isfile(pycaret_path(model_path)):
+                print(f"[WARN] {label}: no model at {model_path}")
+                continue
+            try:
+                pipeline = load_model(model_path, verbose=False)
+                exported = export_pipeline(pipeline)
+                check_parity(pipeline, exported, data)
+            except ValueError as e:
+                failed += 1
+                print(f"[ERROR] {label}: not exported, {e}")
+                continue
+            joblib.dump(exported, exported_path(model_path))
+            print(f"[INFO] {label}: exported to {exported_path(model_path)} ({len(exported.steps)} steps, {len(data)} rows checked)")
+
+    if failed:
+        raise SystemExit(f"{failed} model(s) could not be exported")
+
+
+if __name__ == "__main__":
+    # run from the package module, so the artifacts pickle its classes rather than __main__'s
+    from infrastructure.modules.smells.ml.exported_pipeline import main as export_main
+    export_main()
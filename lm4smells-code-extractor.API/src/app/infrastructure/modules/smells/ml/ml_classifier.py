@@ -1,17 +1,65 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, List
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
 
-from application.dtos.enums.ml_model import MLModel
+from application.dtos.enums.ml_model import ML_MODEL_SETTINGS, MLModel
 from domain.entities.ml_classification import MLClassification
 from infrastructure.config.settings import settings
-from pycaret.classification import load_model as pycaret_load_model
-from pycaret.classification import predict_model as pycaret_predict_model
+from infrastructure.service.storage.result_store import file_fingerprint
+from infrastructure.modules.smells.ml.exported_pipeline import ExportedPipeline
+from infrastructure.modules.smells.ml.model_registry import ml_model_registry, model_fingerprint
+from infrastructure.service.schedule.inference_queue import ml_inference_queue, split_by_sizes
+import numpy as np
 import pandas as pd
 
 
 class MLClassifier:
+    # bump whenever the features or the prediction code change, so stored results are not reused
+    VERSION = "1"
+
+    def __init__(self, batch_size: int = settings.ml_batch_size):
+        self.batch_size = max(1, batch_size)
+
+    def model_version(self, analyse_type, ml_model: MLModel) -> str:
+        """Version of the results ``ml_model`` gives for ``analyse_type``: this code plus the model file."""
+        try:
+            model_path = self._choose_models(analyse_type.value, ml_model)
+        except ValueError:
+            model_path = None
+        # the registry reloads a model when this fingerprint changes, so results never outlive their model
+        return f"{self.VERSION}-{model_fingerprint(model_path) if model_path else file_fingerprint(None)}"
+
+    # model_used of the classifications voted by several models
+    ENSEMBLE_MODEL = "ML_ENSEMBLE"
+
+    def preload(self, spec: str) -> int:
+        """Load the models named by ``spec`` into the registry: "all" or "analyse-type:MODEL" pairs, comma separated."""
+        if spec.strip().lower() == "all":
+            pairs = [(analyse_type, ml_model) for analyse_type, models in ML_MODEL_SETTINGS.items() for ml_model in models]
+        else:
+            pairs = []
+            for item in filter(None, (part.strip() for part in spec.split(","))):
+                analyse_type, _, model_name = item.partition(":")
+                try:
+                    pairs.append((analyse_type.strip(), MLModel(model_name.strip().upper())))
+                except ValueError:
+                    print(f"[WARN] Unknown ML model in ml_model_preload: {item}")
+
+        model_paths = []
+        for analyse_type, ml_model in pairs:
+            try:
+                model_path = self._choose_models(analyse_type, ml_model)
+            except ValueError as e:
+                print(f"[WARN] Skipping {analyse_type}:{ml_model.value} in ml_model_preload: {e}")
+                continue
+            if model_path is None:
+                print(f"[WARN] Unknown analyse type in ml_model_preload: {analyse_type}")
+            else:
+                model_paths.append(model_path)
+        return ml_model_registry.preload(model_paths)
+
     def classify_methods(
         self,
         task_id: str,
@@ -39,29 +87,33 @@ class MLClassifier:
         *,
         element_type: str,
     ) -> List[MLClassification]:
-        classifications: List[MLClassification] = []
-
-        model_path = self._choose_models(analyse_type.value, ml_model)
-        model = pycaret_load_model(model_path)
-
-        for result in extraction_results:
-            metrics: Dict[str, Any] = result.get("code_metric", {}) or {}
-            data = pd.DataFrame([metrics])
-
-            pred_df = pycaret_predict_model(model, data=data, verbose=False)
-
-            prediction = pred_df["prediction_label"].iloc[0]
-            
-            if "prediction_score" in pred_df.columns:
-                confidence = float(pred_df["prediction_score"].iloc[0])
-            else:
-                try:
-                    conf_raw = model.decision_function(data)[0]
-                    confidence = float(abs(conf_raw))
-                except Exception:
-                    confidence = 0.0
+        return self.classify_with_models(task_id, extraction_results, [ml_model], analyse_type, element_type=element_type)[ml_model]
 
-            classifications.append(
+    def classify_with_models(
+        self,
+        task_id: str,
+        extraction_results: List[Dict[str, Any]],
+        ml_models: List[MLModel],
+        analyse_type,
+        *,
+        element_type: str,
+    ) -> Dict[MLModel, List[MLClassification]]:
+        """Classifications of every model in ``ml_models``, each scoring the same feature matrix."""
+        paths = {ml_model: self._choose_models(analyse_type.value, ml_model) for ml_model in ml_models}
+        models = {ml_model: ml_model_registry.get(path) for ml_model, path in paths.items()}
+
+        rows: List[Dict[str, Any]] = [result.get("code_metric", {}) or {} for result in extraction_results]
+        scored: Dict[MLModel, Tuple[List[Any], List[float]]] = {ml_model: ([], []) for ml_model in models}
+        # one prediction per chunk and model instead of per element; the pipelines transform rows independently
+        for start in range(0, len(rows), self.batch_size):
+            data = pd.DataFrame(rows[start:start + self.batch_size])
+            for ml_model, model in models.items():
+                chunk_predictions, chunk_confidences = self._predict_queued(paths[ml_model], model, data)
+                scored[ml_model][0].extend(chunk_predictions)
+                scored[ml_model][1].extend(chunk_confidences)
+
+        return {
+            ml_model: [
                 MLClassification(
                     id=task_id,
                     file_name=result.get('file_name', ''),
@@ -72,9 +124,90 @@ class MLClassifier:
                     confidence_score=confidence,
                     metrics=metrics,
                 )
+                for result, metrics, prediction, confidence in zip(extraction_results, rows, predictions, confidences)
+            ]
+            for ml_model, (predictions, confidences) in scored.items()
+        }
+
+    @classmethod
+    def ensemble(cls, task_id: str, classifications: Dict[MLModel, List[MLClassification]]) -> List[MLClassification]:
+        """One classification per element from the votes of every model.
+
+        The label most models gave wins; a tie goes to the label with the
+        highest mean confidence. The confidence is the mean of the winning
+        label's votes.
+        """
+        votes: Dict[Tuple, List[MLClassification]] = {}
+        for model_classifications in classifications.values():
+            # elements of the same name in a file are told apart by their position
+            seen: Counter = Counter()
+            for classification in model_classifications:
+                element = (classification.file_name, classification.element_type, classification.element_name)
+                votes.setdefault((*element, seen[element]), []).append(classification)
+                seen[element] += 1
+
+        ensemble: List[MLClassification] = []
+        for element_votes in votes.values():
+            by_label: Dict[str, List[float]] = {}
+            for vote in element_votes:
+                by_label.setdefault(vote.classification, []).append(vote.confidence_score or 0.0)
+            label, confidences = max(by_label.items(), key=lambda item: (len(item[1]), sum(item[1]) / len(item[1])))
+
+            first = element_votes[0]
+            ensemble.append(
+                MLClassification(
+                    id=task_id,
+                    file_name=first.file_name,
+                    classification=label,
+                    model_used=cls.ENSEMBLE_MODEL,
+                    element_name=first.element_name,
+                    element_type=first.element_type,
+                    confidence_score=sum(confidences) / len(confidences),
+                    metrics=first.metrics,
+                )
             )
-
-        return classifications
+        return ensemble
+
+    def _predict_queued(self, model_path: str, model, data: pd.DataFrame) -> Tuple[List[Any], List[float]]:
+        """``_predict_frame`` of ``data``, scored in one batch with the rows other tasks send the same model meanwhile."""
+        def run(frames: List[pd.DataFrame]) -> List[Tuple[List[Any], List[float]]]:
+            predictions, confidences = self._predict_frame(model, pd.concat(frames, ignore_index=True))
+            sizes = [len(frame) for frame in frames]
+            return list(zip(split_by_sizes(predictions, sizes), split_by_sizes(confidences, sizes)))
+
+        # frames are only combined with frames of the same columns, so no task sees columns it did not send
+        return ml_inference_queue.submit((model_path, tuple(data.columns)), data, len(data), run)
+
+    def _predict_frame(self, model, data: pd.DataFrame) -> Tuple[List[Any], List[float]]:
+        """Labels and confidences of the rows of ``data``, in order, from a single prediction call."""
+        if isinstance(model, ExportedPipeline):
+            predictions, scores = model.predict_with_scores(data)
+            if scores is not None:
+                return predictions.tolist(), [float(score) for score in scores]
+            return predictions.tolist(), self._decision_confidences(model, data)
+
+        # only pipelines without an exported artifact need pycaret
+        from pycaret.classification import predict_model as pycaret_predict_model
+        pred_df = pycaret_predict_model(model, data=data, verbose=False)
+        predictions = pred_df["prediction_label"].tolist()
+
+        if "prediction_score" in pred_df.columns:
+            return predictions, [float(score) for score in pred_df["prediction_score"]]
+        return predictions, self._decision_confidences(model, data)
+
+    def _decision_confidences(self, model, data: pd.DataFrame) -> List[float]:
+        """Absolute decision function per row, for models without a prediction score; 0.0 when it has none."""
+        try:
+            raw = np.asarray(model.decision_function(data))
+        except Exception:
+            return [0.0] * len(data)
+
+        # a multi-class decision function has no single score per row
+        if raw.ndim == 2 and raw.shape[1] == 1:
+            raw = raw[:, 0]
+        if raw.ndim != 1:
+            return [0.0] * len(data)
+        return [float(abs(value)) for value in raw]
 
     def _get_element_name(self, result: Dict[str, Any], element_type: str) -> str:
         """Extract element name from result."""
@@ -83,59 +216,11 @@ class MLClassifier:
         return result.get('method_name', '')
     
 
-    def _long_method(self, ml_model: MLModel):
-        match ml_model:
-            case MLModel.LGBM:
-                return settings.lgbm_lm_model
-            case MLModel.KNN:
-                return settings.knn_lm_model
-            case MLModel.LDA:
-                return settings.lda_lm_model
-            case MLModel.RIDGE:
-                return settings.ridge_lm_model
-            case MLModel.SGD:
-                return settings.sgd_lm_model
-            case _:
-                raise ValueError(f"Unsupported ML model for long method: {ml_model}")
-
-    def _long_parameter_list(self, ml_model: MLModel):
-        match ml_model:
-            case MLModel.GAUSSIAN:
-                return settings.gaussian_lpl_model
-            case MLModel.KNN:
-                return settings.knn_lpl_model
-            case MLModel.LGBM:
-                return settings.lgbm_lpl_model
-            case MLModel.QDA:
-                return settings.qda_lpl_model
-            case MLModel.SGD:
-                return settings.sgd_lpl_model
-            case _:
-                raise ValueError(f"Unsupported ML model for long parameter list: {ml_model}")
-
-    def _large_class(self, ml_model: MLModel):
-        match ml_model:
-            case MLModel.LGBM:
-                return settings.lgbm_lc_model
-            case MLModel.KNN:
-                return settings.knn_lc_model
-            case MLModel.LDA:
-                return settings.lda_lc_model
-            case MLModel.RIDGE:
-                return settings.ridge_lc_model
-            case MLModel.IR:
-                return settings.ir_lc_model
-            case _:
-                raise ValueError(f"Unsupported ML model for large class: {ml_model}")
-
-
-
-    def _choose_models(self, analyse_type: str, ml_model: MLModel):
-        if analyse_type == "long-method":
-            return self._long_method(ml_model)
-        
-        if analyse_type == "long-parameter-list":
-            return self._long_parameter_list(ml_model)
-        
-        if analyse_type == "large-class":
-            return self._large_class(ml_model)
+    def _choose_models(self, analyse_type: str, ml_model: MLModel) -> Optional[str]:
+        """Path of ``ml_model`` for ``analyse_type``; None for an unknown analyse type."""
+        models = ML_MODEL_SETTINGS.get(analyse_type)
+        if models is None:
+            return None
+        if ml_model not in models:
+            raise ValueError(f"Unsupported ML model for {analyse_type}: {ml_model}")
+        return getattr(settings, models[ml_model])
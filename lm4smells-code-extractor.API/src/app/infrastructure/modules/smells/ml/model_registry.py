@@ -0,0 +1,190 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from infrastructure.config.settings import settings
+from infrastructure.modules.smells.ml.exported_pipeline import ExportedPipeline, exported_path, has_fresh_export, load_exported, pycaret_path
+from infrastructure.service.storage.model_cache import model_cache
+from infrastructure.service.storage.result_store import file_fingerprint
+
+
+def uses_export(model_path: str) -> bool:
+    """Whether ``model_path`` is served from its exported artifact rather than by pycaret."""
+    return settings.ml_use_exported_models and has_fresh_export(model_path)
+
+
+def model_fingerprint(model_path: str) -> str:
+    """Fingerprint of the files ``_load_model`` reads for ``model_path``; replacing one of them changes it."""
+    fingerprint = file_fingerprint(model_path)
+    if uses_export(model_path):
+        fingerprint += f"-{file_fingerprint(exported_path(model_path))}"
+    return fingerprint
+
+
+def _load_pycaret_model(model_path: str) -> Any:
+    # imported on first load, so processes that never classify with ML skip pycaret
+    from pycaret.classification import load_model
+    return load_model(model_path)
+
+
+def _load_model(model_path: str) -> Any:
+    if uses_export(model_path):
+        source, load = exported_path(model_path), lambda: load_exported(model_path)
+    else:
+        source, load = pycaret_path(model_path), lambda: _load_pycaret_model(model_path)
+
+    if model_cache.enabled and os.path.isfile(source):
+        return model_cache.get_pickle("ml", source, load)
+    return load()
+
+
+def _artifact_size(model_path: str) -> int:
+    """Bytes of the pickled pipeline, a close estimate of what it holds once loaded."""
+    if uses_export(model_path):
+        return os.path.getsize(exported_path(model_path))
+    for candidate in (model_path, f"{model_path}.pkl"):   # pycaret paths are given without their extension
+        if os.path.isfile(candidate):
+            return os.path.getsize(candidate)
+    return 0
+
+
+@dataclass
+class _LoadedModel:
+    model: Any
+    fingerprint: str
+    size: int
+    load_seconds: float
+    hits: int = 0
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded ML models, shared by every task.
+
+    A model is unpickled the first time a task asks for it; tasks asking for
+    it meanwhile wait for that load instead of starting their own. Loaded
+    models are kept in an LRU bounded by ``memory_budget`` bytes (estimated
+    from the size of their artifact); the least recently used ones are
+    dropped when a new model does not fit. A model whose files changed on
+    disk (see :func:`model_fingerprint`, also part of the result version)
+    is loaded again. Tasks only predict with the models they get, so one
+    instance is safely shared between threads.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int,
+        loader: Callable[[str], Any] = _load_model,
+        size_of: Callable[[str], int] = _artifact_size,
+        fingerprint_of: Callable[[str], str] = model_fingerprint,
+    ):
+        self.memory_budget = memory_budget
+        self._loader = loader
+        self._size_of = size_of
+        self._fingerprint_of = fingerprint_of
+
+        self._models: "OrderedDict[str, _LoadedModel]" = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "loads": 0, "load_failures": 0, "evictions": 0, "reloads": 0}
+        self._load_seconds = 0.0
+
+    def get(self, model_path: str) -> Any:
+        """The model stored at ``model_path``, loaded once and then shared until its files change."""
+        fingerprint = self._fingerprint_of(model_path)
+        with self._lock:
+            loaded = self._hit(model_path, fingerprint)
+            if loaded is not None:
+                return loaded.model
+            load_lock = self._loading.setdefault(model_path, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                # another task may have loaded it while this one waited
+                loaded = self._hit(model_path, fingerprint)
+                if loaded is not None:
+                    return loaded.model
+                self._counters["misses"] += 1
+                if self._models.pop(model_path, None) is not None:
+                    self._counters["reloads"] += 1
+                    print(f"[INFO] ML model {os.path.basename(model_path)} changed on disk, loading it again")
+
+            started = time.perf_counter()
+            try:
+                model = self._loader(model_path)
+            except Exception:
+                with self._lock:
+                    self._counters["load_failures"] += 1
+                    self._loading.pop(model_path, None)
+                raise
+            load_seconds = time.perf_counter() - started
+
+            with self._lock:
+                self._models[model_path] = _LoadedModel(model, fingerprint, self._size_of(model_path), load_seconds)
+                self._counters["loads"] += 1
+                self._load_seconds += load_seconds
+                self._evict_over_budget(keep=model_path)
+                self._loading.pop(model_path, None)
+
+        print(f"[INFO] ML model {os.path.basename(model_path)} loaded in {load_seconds:.2f}s")
+        return model
+
+    def preload(self, model_paths: Iterable[str]) -> int:
+        """Load ``model_paths`` ahead of the first task; returns how many are resident."""
+        loaded = 0
+        for model_path in model_paths:
+            try:
+                self.get(model_path)
+                loaded += 1
+            except Exception as e:
+                print(f"[WARN] Could not preload ML model {model_path}: {e}")
+        return loaded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+                "load_seconds": self._load_seconds,
+                "resident_bytes": sum(loaded.size for loaded in self._models.values()),
+                "memory_budget": self.memory_budget,
+                "models": {
+                    os.path.basename(model_path): {
+                        "size": loaded.size,
+                        "load_seconds": loaded.load_seconds,
+                        "hits": loaded.hits,
+                        "exported": isinstance(loaded.model, ExportedPipeline),
+                    }
+                    for model_path, loaded in self._models.items()
+                },
+            }
+
+    def _hit(self, model_path: str, fingerprint: str) -> Optional[_LoadedModel]:
+        loaded = self._models.get(model_path)
+        if loaded is not None and loaded.fingerprint == fingerprint:
+            self._models.move_to_end(model_path)
+            loaded.hits += 1
+            self._counters["hits"] += 1
+            return loaded
+        return None
+
+    def _evict_over_budget(self, keep: str) -> None:
+        resident = sum(loaded.size for loaded in self._models.values())
+        for model_path in list(self._models):
+            if resident <= self.memory_budget:
+                return
+            if model_path == keep:
+                continue
+            resident -= self._models.pop(model_path).size
+            self._counters["evictions"] += 1
+            print(f"[INFO] ML model {os.path.basename(model_path)} evicted to stay within the memory budget")
+
+
+ml_model_registry = ModelRegistry(memory_budget=settings.ml_model_memory_budget_mb * 1024 * 1024)
@@ -37,6 +37,32 @@ class DLClassificationRepository:
             print(f"[ERROR] Failed saving DL classification: {e}")
 
 
+    def copy_forward(self, previous_task_id: str, task_id: str, skip_files: List[str]) -> int:
+        """Copy the classifications of ``previous_task_id`` into ``task_id``, leaving out ``skip_files``; returns the rows copied."""
+        try:
+            with self.db_connection.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(
+                    """
+                    INSERT INTO dl_codes (
+                        id, file_name, classification, model_used,
+                        element_name, element_type, confidence_score, metrics, raw_code
+                    )
+                    SELECT %s, file_name, classification, model_used,
+                           element_name, element_type, confidence_score, metrics, raw_code
+                    FROM dl_codes
+                    WHERE id = %s AND NOT (file_name = ANY(%s::text[]))
+                    """,
+                    (task_id, previous_task_id, list(skip_files)),
+                )
+                connection.commit()
+                print(f"[INFO] Carried {cursor.rowcount} DL classifications forward from {previous_task_id} to {task_id}")
+                return cursor.rowcount
+        except Exception as e:
+            print(f"[ERROR] Failed carrying DL classifications forward: {e}")
+            return 0
+
+
     def get_all(self) -> List[dict]:
         try:
             with self.db_connection.get_connection() as connection:
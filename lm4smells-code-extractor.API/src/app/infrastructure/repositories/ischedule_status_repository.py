@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 class IScheduleStatusRepository(ABC):
     @abstractmethod
@@ -8,4 +8,12 @@ class IScheduleStatusRepository(ABC):
 
     @abstractmethod
     def save_schedule_status(self, task_id: str, status: str, task_type: str):
+        pass
+
+    @abstractmethod
+    def save_task_scope(self, task_id: str, scope: str):
+        pass
+
+    @abstractmethod
+    def get_task_scope(self, task_id: str) -> Optional[str]:
         pass
\ No newline at end of file
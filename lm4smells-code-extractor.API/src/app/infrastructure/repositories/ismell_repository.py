@@ -10,6 +10,10 @@ class ISmellRepository(ABC):
     def save_all(self, smells: SmellOccurrence):
         pass
 
+    @abstractmethod
+    def copy_forward(self, previous_task_id: str, task_id: str, skip_files: List[str], smell_types: List[str]) -> int:
+        pass
+
     @abstractmethod
     def get_ast_codes_by_id(self, id: str) -> List[SmellOccurrence]:
         pass
@@ -1,5 +1,5 @@
 from infrastructure.config.db_connection import DatabaseConnection
-from typing import List
+from typing import List, Optional
 
 class ScheduleStatusRepository():
     def __init__(self) -> None:
@@ -31,4 +31,25 @@ class ScheduleStatusRepository():
                 connection.commit()
         except Exception as e:
             print(f"[ERROR] Failed saving schedule status: {e}")
-            raise e
\ No newline at end of file
+            raise e
+
+    def save_task_scope(self, task_id: str, scope: str):
+        """Record what ``task_id`` analyses (extraction, smell, models), checked before carrying its results forward."""
+        try:
+            with self.db_connection.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("""UPDATE tasks SET scope = %s WHERE task_id = %s""", (scope, task_id))
+                connection.commit()
+        except Exception as e:
+            print(f"[ERROR] Failed saving task scope: {e}")
+
+    def get_task_scope(self, task_id: str) -> Optional[str]:
+        try:
+            with self.db_connection.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("""SELECT scope FROM tasks WHERE task_id = %s""", (task_id,))
+                row = cursor.fetchone()
+                return row["scope"] if row else None
+        except Exception as e:
+            print(f"[ERROR] Failed retrieving task scope: {e}")
+            return None
\ No newline at end of file
@@ -35,6 +35,29 @@ class SmellRepository():
         except Exception as e:
             print(f"[ERROR] Failed saving smells: {e}")
 
+    def copy_forward(self, previous_task_id: str, task_id: str, skip_files: List[str], smell_types: List[str]) -> int:
+        """Copy the ``smell_types`` smells of ``previous_task_id`` into ``task_id``, leaving out ``skip_files``; returns the rows copied."""
+        try:
+            with self.db_connection.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("""
+                    INSERT INTO ast_codes (
+                        id, smell_type, description, location, metrics,
+                        definition_author, threshold_used, detected_at
+                    )
+                    SELECT %s, smell_type, description, location, metrics,
+                           definition_author, threshold_used, detected_at
+                    FROM ast_codes
+                    WHERE id = %s AND NOT ((location::json ->> 'file_name') = ANY(%s::text[]))
+                      AND smell_type = ANY(%s::text[])
+                """, (task_id, previous_task_id, list(skip_files), list(smell_types)))
+                connection.commit()
+                print(f"[INFO] Carried {cursor.rowcount} smells forward from {previous_task_id} to {task_id}")
+                return cursor.rowcount
+        except Exception as e:
+            print(f"[ERROR] Failed carrying smells forward: {e}")
+            return 0
+
     def get_ast_codes_by_id(self, id: str) -> List[SmellOccurrence]:
         try:
             with self.db_connection.get_connection() as connection:
@@ -1,19 +1,28 @@
 import ast 
-from typing import Dict, List
-from infrastructure.service.metric_codes.radon_analyzer import RadonAnalyzer
+from typing import Dict, Iterable, List, Sequence
+from infrastructure.service.metric_codes.radon_analyzer import RadonAnalyzer, METRIC_FAMILIES
+from infrastructure.service.metric_codes.metric_cache import metric_cache
+from infrastructure.service.abstractions.source_span import SourceSpan, split_source_lines
 
 class CodeExtractor(ast.NodeVisitor):
     def __init__(self):
         self.items = []
+        self.lines: List[str] = []
         self.metric_codes = RadonAnalyzer()
+        self.metric_cache = metric_cache
     
-    def _get_code(self, file_content: str) -> List[str]:
+    def _get_code(self, file_content: str) -> List[Dict]:
+        """Items of one file, with their ``code`` as a :class:`SourceSpan` over ``file_content``."""
         self.items = []
+        self.lines = split_source_lines(file_content)
         tree = ast.parse(file_content)
         self.visit(tree)
         return self.items
 
-    def extract(self, code_files: List[Dict]) -> List[Dict]:
+    def _span(self, node: ast.AST) -> SourceSpan:
+        return SourceSpan.of(node, self.lines)
+
+    def extract(self, code_files: Iterable[Dict], metric_families: Sequence[str] = METRIC_FAMILIES) -> List[Dict]:
         all_items = []
 
         for codes in code_files:
@@ -23,7 +32,9 @@ class CodeExtractor(ast.NodeVisitor):
             items = self._get_code(code)
 
             for item in items:
-                metric_result = self.metric_codes.analyze(item['code'])
+                # the original text, sliced only now instead of re-generated by ast.unparse
+                item['code'] = item['code'].text()
+                metric_result = self._measure(item['code'], metric_families)
 
                 all_items.append({
                     "file_name": file_name,
@@ -34,4 +45,8 @@ class CodeExtractor(ast.NodeVisitor):
 
         return all_items
 
-    
\ No newline at end of file
+    def _measure(self, code: str, metric_families: Sequence[str]) -> Dict:
+        # nothing downstream reads the metrics, so skip the metric stage entirely
+        if not metric_families:
+            return {}
+        return self.metric_cache.get_or_compute(code, metric_families, self.metric_codes.analyze)
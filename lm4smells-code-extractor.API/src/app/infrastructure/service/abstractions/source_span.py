@@ -0,0 +1,52 @@
+import re
+from dataclasses import dataclass
+from typing import List
+
+# the newlines ast counts lines by (str.splitlines also breaks on \x0c, \x1c, ...)
+_NEWLINE = re.compile(r"\r\n|\r|\n")
+
+
+def split_source_lines(source: str) -> List[str]:
+    return _NEWLINE.split(source)
+
+
+@dataclass(frozen=True)
+class SourceSpan:
+    """Position of a node in the original source.
+
+    Every span of a file points at the same list of lines, so recording one
+    costs no text at all; :meth:`text` slices it out only when it is needed.
+    Lines and columns follow ``ast``: lines are 1-based and columns are UTF-8
+    byte offsets.
+    """
+
+    lines: List[str]
+    start_line: int
+    start_col: int
+    end_line: int
+    end_col: int
+
+    @classmethod
+    def of(cls, node, lines: List[str]) -> "SourceSpan":
+        # decorators belong to the definition, as they did with ast.unparse
+        start_line = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        return cls(lines, start_line, node.col_offset, node.end_lineno, node.end_col_offset)
+
+    def text(self) -> str:
+        """The source of the node, dedented so that nested definitions parse on their own."""
+        lines = self.lines[self.start_line - 1:self.end_line]
+
+        last = lines[-1].encode("utf-8")
+        if len(last) > self.end_col:
+            lines[-1] = last[:self.end_col].decode("utf-8")
+
+        indent = lines[0][:self.start_col]
+        if not indent:
+            return "\n".join(lines)
+        if indent.strip():
+            # something else precedes the node on its first line; keep only the node
+            lines[0] = lines[0].encode("utf-8")[self.start_col:].decode("utf-8")
+            indent = ""
+
+        # lines not carrying the indent (continuations, string bodies) stay as written
+        return "\n".join(line[len(indent):] if line.startswith(indent) else line for line in lines)
@@ -0,0 +1,67 @@
+import ast
+from typing import Dict, Iterable, List, Optional
+
+from application.dtos.enums.extract_type import ExtractType
+from infrastructure.service.abstractions.code_extractor import CodeExtractor
+from infrastructure.service.abstractions.source_span import split_source_lines
+
+# the only nodes that can hold a class or function definition; expressions never do
+_BLOCK_TYPES = (ast.stmt, ast.excepthandler, ast.match_case)
+
+_FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+class CodeItemExtractor(CodeExtractor):
+    """Classes and methods (async ones included) from a single parse and traversal.
+
+    ``kinds`` selects which of them are materialized. Items come in the
+    order ``ast.NodeVisitor`` would visit them, and each one is tagged with
+    ``parent_class``: the class whose body defines it, if any.
+    """
+
+    def __init__(self, kinds: Iterable[ExtractType] = (ExtractType.classes, ExtractType.methods)):
+        super().__init__()
+        self.kinds = frozenset(ExtractType(kind) for kind in kinds)
+        if not self.kinds:
+            raise ValueError("At least one extract type is required")
+
+    def _get_code(self, file_content: str) -> List[Dict]:
+        self.items = []
+        self.lines = split_source_lines(file_content)
+        with_classes = ExtractType.classes in self.kinds
+        with_methods = ExtractType.methods in self.kinds
+
+        # pre-order walk over statements only, children pushed in reverse to keep source order
+        stack: List[tuple] = [(ast.parse(file_content), None)]
+        while stack:
+            node, parent_class = stack.pop()
+            child_class: Optional[str] = parent_class
+
+            if isinstance(node, ast.ClassDef):
+                if with_classes:
+                    self.items.append({
+                        "class_name": node.name,
+                        "lineno": node.lineno,
+                        "code": self._span(node),
+                        "parent_class": parent_class,
+                    })
+                child_class = node.name
+            elif isinstance(node, _FUNCTION_TYPES):
+                if with_methods:
+                    self.items.append({
+                        "method_name": node.name,
+                        "lineno": node.lineno,
+                        "code": self._span(node),
+                        "parent_class": parent_class,
+                        "is_async": isinstance(node, ast.AsyncFunctionDef),
+                    })
+                child_class = None  # local definitions belong to the function
+
+            children: List[ast.AST] = []
+            for name in node._fields:
+                value = getattr(node, name, None)
+                if type(value) is list and value and isinstance(value[0], _BLOCK_TYPES):
+                    children.extend(value)
+            stack.extend((child, child_class) for child in reversed(children))
+
+        return self.items
@@ -1,12 +1,6 @@
-import ast 
-from infrastructure.service.abstractions.code_extractor import CodeExtractor
+from application.dtos.enums.extract_type import ExtractType
+from infrastructure.service.extract_codes.code_item_extractor import CodeItemExtractor
 
-class MethodExtractor(CodeExtractor):
-    def visit_FunctionDef(self, node):
-
-        self.items.append({
-            "method_name": node.name,
-            "lineno": node.lineno,
-            "code": ast.unparse(node)
-        })
-        self.generic_visit(node)
+class MethodExtractor(CodeItemExtractor):
+    def __init__(self):
+        super().__init__(kinds=(ExtractType.methods,))
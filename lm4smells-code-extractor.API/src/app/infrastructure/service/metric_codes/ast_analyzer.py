@@ -1,36 +1,43 @@
 import ast
-from typing import Dict, List, Any, Tuple
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Any, Tuple
+from infrastructure.service.metric_codes.ast_fact_index import FileFacts, build_file_facts
+from infrastructure.service.metric_codes.line_index import LineIndex
 
 class ASTAnalyzer:
+    def __init__(self):
+        self._shared_facts: Dict[str, FileFacts] = {}
+
+    def index_source(self, source: str, filename: str) -> FileFacts:
+        """Parse ``source`` once and return its per-class and per-function fact table."""
+        facts = self._shared_facts.get(filename)
+        if facts is not None and facts.source == source:
+            return facts
+        return build_file_facts(source, filename)
+
+    @contextmanager
+    def shared_facts(self, facts: FileFacts):
+        """Serve ``facts`` to every ``index_source`` call for its file inside the block."""
+        self._shared_facts[facts.filename] = facts
+        try:
+            yield facts
+        finally:
+            self._shared_facts.pop(facts.filename, None)
+
     def count_parameters_from_source(self, source: str, filename: str) -> List[Dict[str, Any]]:
-        tree = ast.parse(source, filename=filename)
-        methods: List[Dict[str, Any]] = []
-
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                positional = len(node.args.args)          # includes self/cls if present
-                kwonly = len(node.args.kwonlyargs)
-                vararg = 1 if node.args.vararg else 0     # *args
-                varkw  = 1 if node.args.kwarg else 0      # **kwargs
-                defaults = len(node.args.defaults)         # auxiliary info
-
-                total = positional + kwonly + vararg + varkw
-
-                methods.append({
-                    "name": node.name,
-                    "line": node.lineno,
-                    "parameters": {
-                        "total": total,
-                        "positional": positional,
-                        "positional_with_defaults": defaults,
-                        "kwonly": kwonly,
-                        "vararg": vararg,
-                        "varkw": varkw,
-                    },
-                    "filename": filename,
-                })
-
-        return methods
+        return self.parameters_from_facts(self.index_source(source, filename))
+
+    def parameters_from_facts(self, facts: FileFacts) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": function.name,
+                "line": function.line,
+                "parameters": dict(function.parameters),
+                "filename": facts.filename,
+            }
+            for function in facts.functions
+        ]
 
     def count_parameters_from_sources(self, sources: List[str], filenames: List[str]) -> Dict[str, List[Dict[str, Any]]]:
         results: Dict[str, List[Dict[str, Any]]] = {}
@@ -46,141 +53,72 @@ class ASTAnalyzer:
     # ---------- 🔽 NOVOS AUXILIARES REFEITOS 🔽 ----------
 
     def count_attributes(self, source: str, filename: str) -> Dict[str, Dict[str, int]]:
-
-        tree = ast.parse(source, filename=filename)
-        result: Dict[str, Dict[str, int]] = {}
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                total_attrs = 0
-                for body_item in node.body:
-                    if isinstance(body_item, ast.Assign):
-                        total_attrs += len(body_item.targets)
-                result[node.name] = {"total_attributes": total_attrs}
-
-        return result
+        facts = self.index_source(source, filename)
+        return {c.name: {"total_attributes": c.noa} for c in facts.classes}
 
     def count_methods(self, source: str, filename: str) -> Dict[str, Dict[str, Any]]:
-
-        tree = ast.parse(source, filename=filename)
-        result: Dict[str, Dict[str, Any]] = {}
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
-                result[node.name] = {
-                    "total_methods": len(methods),
-                    "start_line": node.lineno,
-                }
-
-        return result
-    
-    
+        facts = self.index_source(source, filename)
+        return {c.name: {"total_methods": c.nom, "start_line": c.start_line} for c in facts.classes}
 
     def count_class_loc(self, source: str, filename: str, start_line: int) -> int:
-
-        lines = source.splitlines()
-       # get the indentation of the class line
-        indent_level = len(lines[start_line]) - len(lines[start_line].lstrip())
-        loc = 0
-        for i in range(start_line, len(lines)):
-            line = lines[i]
-            if line.strip() and not line.strip().startswith("#"):
-                current_indent = len(line) - len(line.lstrip())
-                if current_indent <= indent_level and i > start_line:
-                    break
-                loc += 1
-        return loc
+        facts = self._shared_facts.get(filename)
+        lines = facts.lines if facts is not None and facts.source == source else LineIndex(source)
+        return lines.block_loc(start_line)
 
     def calculate_dit(self, source: str, filename: str, class_name: str) -> int:
-
-        tree = ast.parse(source, filename=filename)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef) and node.name == class_name:
-                return len(node.bases) if node.bases else 1
+        for c in self.index_source(source, filename).classes:
+            if c.name == class_name:
+                return c.dit
         return 1
 
-    def parse_source(self, source: str, filename: str):
-
-        tree = ast.parse(source, filename=filename)
-        # add reference to 'parent' (required in Magic Number)
-        for node in ast.walk(tree):
-            for child in ast.iter_child_nodes(node):
-                child.parent = node
-
-        return tree
-
-    def iter_numeric_literals(self, tree):
-        for n in ast.walk(tree):
-            if isinstance(n, ast.Constant) and isinstance(n.value, (int, float)):
-                yield float(n.value), n, getattr(n, "parent", None)
-            elif (
-                isinstance(n, ast.UnaryOp) and isinstance(n.op, ast.USub)
-                and isinstance(n.operand, ast.Constant)
-                and isinstance(n.operand.value, (int, float))
-            ):
-                yield float(-n.operand.value), n, getattr(n, "parent", None)
-
-    def is_constant_assignment(self, node) -> bool:
-        p = node
-        while p is not None and not isinstance(p, (ast.Assign, ast.AnnAssign, ast.arg)):
-            p = getattr(p, "parent", None)
-
-        if isinstance(p, ast.Assign):
-            targets = [t.id for t in p.targets if isinstance(t, ast.Name)]
-            return any(t.isupper() for t in targets)
-
-        if isinstance(p, ast.AnnAssign) and isinstance(p.target, ast.Name):
-            return p.target.id.isupper()
-
-        return False
-
-    def is_parameter_default(self, node) -> bool:
-        p = node
-        while p is not None and not isinstance(p, (ast.arg,)):
-            p = getattr(p, "parent", None)
-        return isinstance(p, ast.arg)
-
+    def iter_numeric_literal_contexts(self, tree) -> Iterator[Tuple[float, ast.AST, bool]]:
+        """Yield ``(value, holder, exempt)`` for every numeric literal, in ``ast.walk`` order.
+
+        ``exempt`` tells whether the literal is assigned to an upper-case
+        constant or is a parameter default. Each queued node carries the
+        answer of its nearest Assign/AnnAssign/arg ancestor, so no parent
+        links are needed and nothing is climbed per literal.
+        """
+        queue = deque([(tree, False)])
+        pop, push = queue.popleft, queue.append
+        while queue:
+            node, exempt = pop()
+            node_type = type(node)
+
+            if node_type is ast.Constant:
+                if isinstance(node.value, (int, float)):
+                    yield float(node.value), node, exempt
+                continue  # no child nodes
+
+            if node_type is ast.UnaryOp:
+                operand = node.operand
+                if (
+                    type(node.op) is ast.USub
+                    and type(operand) is ast.Constant
+                    and isinstance(operand.value, (int, float))
+                ):
+                    yield float(-operand.value), node, exempt
+            elif node_type is ast.Assign:
+                exempt = any(type(t) is ast.Name and t.id.isupper() for t in node.targets)
+            elif node_type is ast.AnnAssign:
+                exempt = type(node.target) is ast.Name and node.target.id.isupper()
+            elif node_type is ast.arg:
+                exempt = True
+
+            for name in node._fields:
+                value = getattr(node, name, None)
+                if isinstance(value, ast.AST):
+                    push((value, exempt))
+                elif isinstance(value, list):
+                    for child in value:
+                        if isinstance(child, ast.AST):
+                            push((child, exempt))
 
     def calculate_lcom(self, source: str, filename: str):
-        tree = ast.parse(source, filename=filename)
-        results = {}
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                methods = [n for n in node.body if isinstance(n, ast.FunctionDef)]
-                attributes = set()
-
-                for method in methods:
-                    for subnode in ast.walk(method):
-                        if (
-                            isinstance(subnode, ast.Attribute)
-                            and isinstance(subnode.value, ast.Name)
-                            and subnode.value.id == "self"
-                        ):
-                            attributes.add(subnode.attr)
-
-                results[node.name] = (
-                    0.0
-                    if not methods or not attributes
-                    else 1 - (len(attributes) / (len(methods) * len(attributes)))
-                )
-
-        return results
-
+        return {c.name: c.lcom for c in self.index_source(source, filename).classes}
 
     def calculate_lwmc(self, source: str, filename: str):
-        tree = ast.parse(source, filename=filename)
-        results = {}
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                total_complexity = 0
-                for method in [n for n in node.body if isinstance(n, ast.FunctionDef)]:
-                    total_complexity += self.calculate_cyclomatic_complexity(method)
-                results[node.name] = total_complexity
-
-        return results
+        return {c.name: c.lwmc for c in self.index_source(source, filename).classes}
     
     def calculate_cyclomatic_complexity(self, node: ast.AST) -> int:
 
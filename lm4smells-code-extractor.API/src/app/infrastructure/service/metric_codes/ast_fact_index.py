@@ -0,0 +1,197 @@
+import ast
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from infrastructure.service.metric_codes.line_index import LineIndex
+
+# nodes adding one path each to the cyclomatic complexity (ExceptHandler too)
+_BRANCH_TYPES = frozenset((ast.If, ast.For, ast.While, ast.And, ast.Or, ast.Try, ast.With))
+
+
+@dataclass
+class FunctionFacts:
+    name: str
+    line: int
+    end_line: int
+    parameters: Dict[str, int]
+    is_async: bool
+    class_name: Optional[str] = None       # directly enclosing class, if any
+    complexity: int = 1                     # cyclomatic complexity, nested code included
+    self_attributes: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class ClassFacts:
+    name: str
+    start_line: int
+    end_line: int
+    loc: int
+    noa: int
+    nom: int
+    dit: int
+    lwmc: int
+    lcom: float
+
+
+class FileFacts:
+    """One parsed file plus its class and function fact tables.
+
+    The tables are filled by a single traversal the first time either one is
+    read, so detectors that only need the tree never pay for them, and class
+    facts (LOC spans) are only derived when a class detector asks. The line
+    index behind every LOC query is likewise built once and shared.
+    """
+
+    def __init__(self, filename: str, source: str, tree: ast.AST):
+        self.filename = filename
+        self.source = source
+        self.tree = tree
+        self._lines: Optional[LineIndex] = None
+        self._classes: Optional[List[ClassFacts]] = None
+        self._functions: Optional[List[FunctionFacts]] = None
+        self._class_nodes: List[ast.ClassDef] = []
+        self._function_facts: Dict[int, FunctionFacts] = {}
+
+    @property
+    def lines(self) -> LineIndex:
+        if self._lines is None:
+            self._lines = LineIndex(self.source)
+        return self._lines
+
+    @property
+    def classes(self) -> List[ClassFacts]:
+        if self._classes is None:
+            if self._functions is None:
+                self._collect()
+            lines = self.lines
+            self._classes = [_class_facts(node, lines, self._function_facts) for node in self._class_nodes]
+        return self._classes
+
+    @property
+    def functions(self) -> List[FunctionFacts]:
+        if self._functions is None:
+            self._collect()
+        return self._functions
+
+    def classes_by_name(self) -> Dict[str, ClassFacts]:
+        """Classes keyed by name; a repeated name keeps its first position and its last facts."""
+        return {facts.name: facts for facts in self.classes}
+
+    def _collect(self) -> None:
+        functions: List[tuple] = []
+        classes: List[tuple] = []
+        function_facts: Dict[int, FunctionFacts] = {}
+        open_functions: List[FunctionFacts] = []
+
+        # children are pushed left to right, so this is a mirrored pre-order walk;
+        # the None marker closes the function opened right before it
+        order = 0
+        stack: List[Any] = [(self.tree, 0, None)]
+        while stack:
+            entry = stack.pop()
+            if entry is None:
+                open_functions.pop()
+                continue
+
+            node, depth, class_name = entry
+            node_type = type(node)
+            order += 1
+
+            if open_functions:
+                if node_type in _BRANCH_TYPES or node_type is ast.ExceptHandler:
+                    delta = 1
+                elif node_type is ast.BoolOp:  # multiple conditions in if/while
+                    delta = len(node.values) - 1
+                else:
+                    delta = 0
+                if delta:
+                    for facts in open_functions:
+                        facts.complexity += delta
+
+                if node_type is ast.Attribute and type(node.value) is ast.Name and node.value.id == "self":
+                    for facts in open_functions:
+                        facts.self_attributes.add(node.attr)
+
+            child_class = None
+            if node_type is ast.FunctionDef or node_type is ast.AsyncFunctionDef:
+                facts = FunctionFacts(
+                    name=node.name,
+                    line=node.lineno,
+                    end_line=getattr(node, "end_lineno", None) or node.lineno,
+                    parameters=_count_parameters(node.args),
+                    is_async=node_type is ast.AsyncFunctionDef,
+                    class_name=class_name,
+                )
+                function_facts[id(node)] = facts
+                functions.append(((depth, -order), facts))
+                open_functions.append(facts)
+                stack.append(None)
+            elif node_type is ast.ClassDef:
+                classes.append(((depth, -order), node))
+                child_class = node.name
+
+            # inlined ast.iter_child_nodes, the hot loop of the traversal
+            depth += 1
+            for name in node._fields:
+                value = getattr(node, name, None)
+                if isinstance(value, ast.AST):
+                    stack.append((value, depth, child_class))
+                elif isinstance(value, list):
+                    for child in value:
+                        if isinstance(child, ast.AST):
+                            stack.append((child, depth, child_class))
+
+        # ast.walk is breadth-first: by depth, then left to right (reversed mirror order)
+        functions.sort(key=lambda item: item[0])
+        classes.sort(key=lambda item: item[0])
+
+        self._functions = [facts for _, facts in functions]
+        self._class_nodes = [node for _, node in classes]
+        self._function_facts = function_facts
+
+
+def build_file_facts(source: str, filename: str) -> FileFacts:
+    """Parse ``source`` once; classes and functions are listed in ``ast.walk`` order."""
+    return FileFacts(filename, source, ast.parse(source, filename=filename))
+
+
+def _class_facts(node: ast.ClassDef, lines: LineIndex, function_facts: Dict[int, FunctionFacts]) -> ClassFacts:
+    noa = sum(len(item.targets) for item in node.body if isinstance(item, ast.Assign))
+    nom = sum(1 for item in node.body if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)))
+
+    # LWMC and LCOM only ever considered plain (non async) methods
+    methods = [function_facts[id(item)] for item in node.body if isinstance(item, ast.FunctionDef)]
+    lwmc = sum(method.complexity for method in methods)
+    attributes: Set[str] = set()
+    for method in methods:
+        attributes |= method.self_attributes
+    lcom = 0.0 if not methods or not attributes else 1 - (len(attributes) / (len(methods) * len(attributes)))
+
+    loc = lines.block_loc(node.lineno - 1)
+
+    return ClassFacts(
+        name=node.name,
+        start_line=node.lineno,
+        end_line=node.lineno + loc - 1,
+        loc=loc,
+        noa=noa,
+        nom=nom,
+        dit=len(node.bases) if node.bases else 1,
+        lwmc=lwmc,
+        lcom=lcom,
+    )
+
+
+def _count_parameters(args: ast.arguments) -> Dict[str, int]:
+    positional = len(args.args)          # includes self/cls if present
+    kwonly = len(args.kwonlyargs)
+    vararg = 1 if args.vararg else 0     # *args
+    varkw = 1 if args.kwarg else 0       # **kwargs
+    return {
+        "total": positional + kwonly + vararg + varkw,
+        "positional": positional,
+        "positional_with_defaults": len(args.defaults),
+        "kwonly": kwonly,
+        "vararg": vararg,
+        "varkw": varkw,
+    }
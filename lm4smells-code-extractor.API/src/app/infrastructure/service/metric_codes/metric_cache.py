@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence
+
+import radon
+
+from infrastructure.config.settings import settings
+
+
+class MetricCache:
+    """Content-addressed cache for the metrics of an extracted item.
+
+    Entries are keyed by a hash of the normalized item code and the metric
+    family, so the same method body measured by the LM, ML or DL paths (or uploaded again) is only
+    analysed once. A bounded in-memory LRU sits in front of an optional
+    sqlite file that survives restarts.
+    """
+
+    def __init__(self, max_size: int = 10000, cache_dir: Optional[str] = None, max_disk_size: int = 200000):
+        self.max_size = max_size
+        self.max_disk_size = max_disk_size
+        # bumping radon changes the numbers, so it is part of every key
+        self.version = f"radon-{radon.__version__}"
+
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+
+        self._disk: Optional[sqlite3.Connection] = None
+        self._disk_size = 0
+        if cache_dir:
+            self._open_disk(cache_dir)
+
+    @staticmethod
+    def normalize(code: str) -> str:
+        lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        return "\n".join(line.rstrip() for line in lines)
+
+    def key_for(self, code: str, namespace: str = "") -> str:
+        return self._key(self.normalize(code), namespace)
+
+    def get_or_compute(self, code: str, families: Sequence[str], compute: Callable[[str, Sequence[str]], Dict]) -> Dict:
+        """Return the requested metric families for ``code``.
+
+        Every family is cached under its own key, so families already measured
+        for another approach are reused and only the missing ones are computed.
+        """
+        normalized = self.normalize(code)
+        keys = {family: self._key(normalized, family) for family in families}
+
+        results = {}
+        missing = []
+        for family, key in keys.items():
+            cached = self.get(key)
+            if cached is None:
+                missing.append(family)
+            else:
+                results[family] = cached
+
+        if missing:
+            computed = compute(normalized, missing)
+            for family in missing:
+                self.put(keys[family], computed[family])
+                results[family] = computed[family]
+
+        return {family: results[family] for family in families}
+
+    def _key(self, normalized: str, namespace: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{self.version}\0{namespace}\0".encode("utf-8"))
+        digest.update(normalized.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self._counters["hits"] += 1
+                return json.loads(payload)
+
+            payload = self._disk_get(key)
+            if payload is not None:
+                self._counters["disk_hits"] += 1
+                self._memory_put(key, payload)
+                return json.loads(payload)
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key: str, value: Dict) -> None:
+        payload = json.dumps(value)
+        with self._lock:
+            self._memory_put(key, payload)
+            self._disk_put(key, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM metric_cache")
+                self._disk.commit()
+                self._disk_size = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = self._counters["hits"] + self._counters["disk_hits"]
+            return {
+                **self._counters,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "size": len(self._memory),
+                "max_size": self.max_size,
+                "disk_enabled": self._disk is not None,
+                "disk_size": self._disk_size,
+                "max_disk_size": self.max_disk_size,
+                "version": self.version,
+            }
+
+    def _memory_put(self, key: str, payload: str) -> None:
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _open_disk(self, cache_dir: str) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        self._disk = sqlite3.connect(
+            os.path.join(cache_dir, "metric_cache.sqlite3"),
+            timeout=30,
+            check_same_thread=False,
+        )
+        self._disk.execute(
+            "CREATE TABLE IF NOT EXISTS metric_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._disk.execute("CREATE INDEX IF NOT EXISTS metric_cache_accessed_at ON metric_cache (accessed_at)")
+        self._disk.commit()
+        self._disk_size = self._disk.execute("SELECT COUNT(*) FROM metric_cache").fetchone()[0]
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        if self._disk is None:
+            return None
+        try:
+            row = self._disk.execute("SELECT value FROM metric_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._disk.execute("UPDATE metric_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._disk.commit()
+            return row[0]
+        except sqlite3.Error as e:
+            print(f"[WARN] Metric cache disk read failed: {e}")
+            return None
+
+    def _disk_put(self, key: str, payload: str) -> None:
+        if self._disk is None:
+            return
+        try:
+            inserted = self._disk.execute(
+                "INSERT OR IGNORE INTO metric_cache (key, value, accessed_at) VALUES (?, ?, ?)",
+                (key, payload, time.time()),
+            ).rowcount
+            self._disk_size += inserted
+            if self._disk_size > self.max_disk_size:
+                overflow = self._disk_size - self.max_disk_size
+                self._disk.execute(
+                    "DELETE FROM metric_cache WHERE key IN (SELECT key FROM metric_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self._disk_size -= overflow
+                self._counters["disk_evictions"] += overflow
+            self._disk.commit()
+        except sqlite3.Error as e:
+            print(f"[WARN] Metric cache disk write failed: {e}")
+
+
+metric_cache = MetricCache(
+    max_size=settings.metric_cache_size,
+    cache_dir=settings.metric_cache_dir,
+    max_disk_size=settings.metric_cache_disk_size,
+)
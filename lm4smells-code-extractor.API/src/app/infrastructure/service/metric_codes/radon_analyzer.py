@@ -1,8 +1,94 @@
+import ast
 import subprocess
 import json
+from typing import Iterable
+from radon.cli.tools import cc_to_dict, raw_to_dict
+from radon.complexity import SCORE, sorted_results
+from radon.metrics import h_visit_ast, mi_compute, mi_rank
+from radon.raw import analyze as raw_analyze
+from radon.visitors import ComplexityVisitor
+
+# radon reports code read from stdin under the "-" file name
+SOURCE_KEY = "-"
+
+METRIC_FAMILIES = ("raw", "cc", "mi", "hal")
+
 
 class RadonAnalyzer:
-    def analyze(self, code: str) -> dict:
+    def analyze(self, code: str, families: Iterable[str] = METRIC_FAMILIES) -> dict:
+        """Compute the requested radon families in-process over a single parse of ``code``.
+
+        Each family has the same shape as the ``radon <family> -j -`` output
+        returned by :meth:`analyze_with_cli`. Families that are not requested
+        are neither computed nor included in the result.
+        """
+        state = {"code": code}
+        calculators = {"raw": self._raw, "cc": self._cc, "mi": self._mi, "hal": self._hal}
+
+        results = {}
+        for name in families:
+            if name not in calculators:
+                raise ValueError(f"Unsupported metric family: {name}")
+            try:
+                results[name] = calculators[name](state)
+            except Exception as e:
+                results[name] = {SOURCE_KEY: {"error": str(e)}}
+
+        return results
+
+    def _tree(self, state: dict) -> ast.AST:
+        if "tree" not in state:
+            state["tree"] = ast.parse(state["code"])
+        return state["tree"]
+
+    def _raw_result(self, state: dict):
+        if "raw" not in state:
+            state["raw"] = raw_analyze(state["code"])
+        return state["raw"]
+
+    def _complexity(self, state: dict) -> ComplexityVisitor:
+        if "complexity" not in state:
+            state["complexity"] = ComplexityVisitor.from_ast(self._tree(state))
+        return state["complexity"]
+
+    def _halstead(self, state: dict):
+        if "halstead" not in state:
+            state["halstead"] = h_visit_ast(self._tree(state))
+        return state["halstead"]
+
+    def _raw(self, state: dict) -> dict:
+        return {SOURCE_KEY: raw_to_dict(self._raw_result(state))}
+
+    def _cc(self, state: dict) -> dict:
+        blocks = sorted_results(self._complexity(state).blocks, order=SCORE)
+        values = [cc_to_dict(block) for block in blocks]
+        # the CLI leaves out files without any function or class block
+        return {SOURCE_KEY: values} if values else {}
+
+    def _mi(self, state: dict) -> dict:
+        raw = self._raw_result(state)
+        # `radon mi` counts multi-line strings as comments by default
+        comments_lines = raw.comments + raw.multi
+        comments = comments_lines / float(raw.sloc) * 100 if raw.sloc != 0 else 0
+        mi = mi_compute(
+            self._halstead(state).total.volume,
+            self._complexity(state).total_complexity,
+            raw.lloc,
+            comments,
+        )
+        return {SOURCE_KEY: {"mi": mi, "rank": mi_rank(mi)}}
+
+    def _hal(self, state: dict) -> dict:
+        halstead = self._halstead(state)
+        return {
+            SOURCE_KEY: {
+                "total": halstead.total._asdict(),
+                "functions": {name: report._asdict() for name, report in halstead.functions},
+            }
+        }
+
+    def analyze_with_cli(self, code: str) -> dict:
+        """Reference implementation that spawns one ``radon`` process per family."""
         commands = {
             "raw": ["radon", "raw", "-j", "-"],
             "cc":  ["radon", "cc", "-j", "-"],
@@ -29,4 +115,4 @@ class RadonAnalyzer:
             except json.JSONDecodeError:
                 return {"error": f"Failed to parse JSON output: {stdout}"}
         else:
-            raise RuntimeError(f"Error executing command {' '.join(command)}: {stderr}")
\ No newline at end of file
+            raise RuntimeError(f"Error executing command {' '.join(command)}: {stderr}")
@@ -0,0 +1,166 @@
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+from infrastructure.config.settings import settings
+
+# upper bounds of the histogram buckets; the last bucket holds everything above
+BATCH_ROW_BUCKETS = [1, 8, 64, 256, 1024, 4096, 16384]
+WAIT_MS_BUCKETS = [0.5, 1, 2, 5, 10, 20, 50, 100, 500]
+
+
+def split_by_sizes(items: Sequence, sizes: Sequence[int]) -> List[Sequence]:
+    """``items`` cut back into consecutive slices of ``sizes``."""
+    slices, start = [], 0
+    for size in sizes:
+        slices.append(items[start:start + size])
+        start += size
+    return slices
+
+
+class _Histogram:
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.samples = 0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.samples += 1
+
+    def as_dict(self) -> Dict:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "mean": self.total / self.samples if self.samples else 0.0,
+        }
+
+
+class _Batch:
+    def __init__(self):
+        self.payloads: List[Any] = []
+        self.submitted: List[float] = []
+        self.rows = 0
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results: Optional[List[Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class InferenceQueue:
+    """Combines the predictions concurrent tasks ask of the same model into shared batches.
+
+    The first task to submit rows for a model opens a batch and waits up to
+    ``max_wait_ms`` for other tasks to add theirs, or until the batch holds
+    ``max_batch_size`` rows; it then runs the whole batch once and hands
+    every task its own slice of the results. Requests of ``max_batch_size``
+    rows or more run on their own straight away. The sizes of the batches
+    and how long requests waited for them are kept as histograms.
+    """
+
+    def __init__(self, name: str, max_batch_size: int = 4096, max_wait_ms: float = 5.0, enabled: bool = True):
+        self.name = name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.enabled = enabled
+
+        self._open: Dict[Hashable, _Batch] = {}
+        self._lock = threading.Lock()
+        self._counters = {"batches": 0, "requests": 0, "rows": 0, "failures": 0}
+        self._batch_rows = _Histogram(BATCH_ROW_BUCKETS)
+        self._batch_requests = _Histogram([1, 2, 3, 5, 10])
+        self._wait_ms = _Histogram(WAIT_MS_BUCKETS)
+
+    def submit(self, key: Hashable, payload: Any, rows: int, run: Callable[[List[Any]], List[Any]]) -> Any:
+        """The result for ``payload`` once a batch of ``key`` ran; ``run`` gets every payload and returns one result each."""
+        if not self.enabled or rows >= self.max_batch_size:
+            return self._run([payload], [time.perf_counter()], rows, run)[0]
+
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None or batch.rows + rows > self.max_batch_size
+            if leader:
+                if batch is not None:
+                    # no room left: let its leader run it now and start the next one
+                    self._close(key, batch)
+                batch = _Batch()
+                self._open[key] = batch
+
+            index = len(batch.payloads)
+            batch.payloads.append(payload)
+            batch.submitted.append(time.perf_counter())
+            batch.rows += rows
+            if batch.rows >= self.max_batch_size:
+                self._close(key, batch)
+
+        if leader:
+            batch.full.wait(timeout=self.max_wait)
+            with self._lock:
+                self._close(key, batch)
+            try:
+                batch.results = self._run(batch.payloads, batch.submitted, batch.rows, run)
+            except BaseException as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[index]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "enabled": self.enabled,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batch_rows": self._batch_rows.as_dict(),
+                "batch_requests": self._batch_requests.as_dict(),
+                "wait_ms": self._wait_ms.as_dict(),
+            }
+
+    def _close(self, key: Hashable, batch: _Batch) -> None:
+        batch.full.set()
+        if self._open.get(key) is batch:
+            del self._open[key]
+
+    def _run(self, payloads: List[Any], submitted: List[float], rows: int, run: Callable[[List[Any]], List[Any]]) -> List[Any]:
+        started = time.perf_counter()
+        with self._lock:
+            self._counters["batches"] += 1
+            self._counters["requests"] += len(payloads)
+            self._counters["rows"] += rows
+            self._batch_rows.add(rows)
+            self._batch_requests.add(len(payloads))
+            for submitted_at in submitted:
+                self._wait_ms.add((started - submitted_at) * 1000)
+
+        try:
+            results = run(payloads)
+        except Exception:
+            with self._lock:
+                self._counters["failures"] += 1
+            raise
+        if len(results) != len(payloads):
+            raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(payloads)} requests")
+        return results
+
+
+ml_inference_queue = InferenceQueue(
+    "ml",
+    max_batch_size=settings.inference_queue_max_batch_size,
+    max_wait_ms=settings.inference_queue_max_wait_ms,
+    enabled=settings.inference_queue_enabled,
+)
+dl_inference_queue = InferenceQueue(
+    "dl",
+    max_batch_size=settings.inference_queue_max_batch_size,
+    max_wait_ms=settings.inference_queue_max_wait_ms,
+    enabled=settings.inference_queue_enabled,
+)
@@ -0,0 +1,87 @@
+import os
+import subprocess
+from typing import Iterable, Iterator, List, Tuple
+
+from infrastructure.config.settings import settings
+
+
+class GitRepository:
+    """Read-only access to a local git repository through the ``git`` CLI.
+
+    Only local plumbing commands are used (``rev-parse``, ``diff``,
+    ``ls-tree``, ``cat-file``), so nothing ever touches the network or the
+    working tree.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._git("rev-parse", "--git-dir")
+
+    @classmethod
+    def open(cls, repo_path: str) -> "GitRepository":
+        """Open ``repo_path``, resolved inside the configured ``git_repository_root``."""
+        if not settings.git_repository_root:
+            raise ValueError("Git analysis is disabled: set git_repository_root to the folder holding the repositories")
+
+        root = os.path.realpath(settings.git_repository_root)
+        path = os.path.realpath(os.path.join(root, repo_path))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Repository {repo_path} is outside of git_repository_root")
+        return cls(path)
+
+    def resolve(self, revision: str) -> str:
+        if revision.startswith("-"):
+            raise ValueError(f"Invalid revision: {revision}")
+        return self._git("rev-parse", "--verify", "--quiet", f"{revision}^{{commit}}").decode().strip()
+
+    def files(self, revision: str) -> List[str]:
+        output = self._git("ls-tree", "-r", "-z", "--name-only", revision)
+        return [path for path in output.decode("utf-8").split("\0") if path]
+
+    def diff(self, base: str, head: str) -> Tuple[List[str], List[str]]:
+        """Paths added or modified, and paths deleted, from ``base`` to ``head``.
+
+        Renames are reported as a deletion plus an addition.
+        """
+        output = self._git("diff", "--name-status", "-z", "--no-renames", base, head)
+        fields = output.decode("utf-8").split("\0")
+
+        changed: List[str] = []
+        deleted: List[str] = []
+        for status, path in zip(fields[0::2], fields[1::2]):
+            (deleted if status == "D" else changed).append(path)
+        return changed, deleted
+
+    def read_files(self, revision: str, paths: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+        """Contents of ``paths`` at ``revision``, one at a time, from a single ``cat-file`` process."""
+        process = subprocess.Popen(
+            ["git", "-C", self.path, "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            for path in paths:
+                if "\n" in path:
+                    continue  # cannot be asked for in batch mode
+                process.stdin.write(f"{revision}:{path}\n".encode("utf-8"))
+                process.stdin.flush()
+
+                header = process.stdout.readline().split()
+                # "<object> missing" echoes the path asked for, which may itself contain spaces
+                if not header or header[-1] in (b"missing", b"ambiguous") or len(header) != 3:
+                    continue
+                content = process.stdout.read(int(header[2]))
+                process.stdout.read(1)  # trailing newline
+                if header[1] == b"blob":
+                    yield path, content
+        finally:
+            process.stdin.close()
+            process.wait()
+
+    def _git(self, *args: str) -> bytes:
+        process = subprocess.run(["git", "-C", self.path, *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if process.returncode != 0:
+            message = process.stderr.decode("utf-8", "replace").strip() or f"git {args[0]} failed"
+            raise ValueError(f"Error executing git {args[0]} in {self.path}: {message}")
+        return process.stdout
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from infrastructure.config.settings import settings
+
+# bump whenever the layout of a cache entry changes, so older entries are compiled again
+CACHE_FORMAT = "1"
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelCache:
+    """Compiled forms of the model artifacts, mapped from disk instead of rebuilt on every start.
+
+    The first process to load an artifact compiles it (the DL archive into
+    its architecture plus one ``.npy`` file per weight, an ML pipeline into
+    an uncompressed joblib pickle) under a folder keyed by the SHA-256 of
+    the artifact and ``CACHE_FORMAT``. Later starts and forked workers
+    memory-map those files: nothing is unzipped or written to a temp file,
+    and the weights of every worker share the same page cache. Entries are
+    written to a temporary name and renamed into place, so a process never
+    maps a half written entry.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "compiles": 0, "failures": 0}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.cache_dir)
+
+    def get_arrays(
+        self,
+        kind: str,
+        source_path: str,
+        compile: Callable[[], Tuple[Dict, Dict[str, np.ndarray]]],
+    ) -> Tuple[Dict, Dict[str, np.ndarray]]:
+        """The metadata and read-only memory-mapped arrays of ``source_path``, compiled on the first call."""
+        entry = self._entry_path(kind, source_path)
+        if not os.path.isdir(entry):
+            metadata, arrays = self._compiled(compile)
+            self._write_arrays(entry, metadata, arrays)
+            self._count("compiles")
+        else:
+            self._count("hits")
+
+        with open(os.path.join(entry, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(entry, file_name), mmap_mode="r", allow_pickle=False)
+            for name, file_name in manifest["arrays"].items()
+        }
+        return manifest["metadata"], arrays
+
+    def get_pickle(self, kind: str, source_path: str, load: Callable[[], Any]) -> Any:
+        """The object ``load`` builds from ``source_path``, kept as a joblib pickle whose arrays are mapped copy-on-write."""
+        import joblib
+
+        entry = f"{self._entry_path(kind, source_path)}.joblib"
+        if not os.path.isfile(entry):
+            model = self._compiled(load)
+            handle, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-", suffix=".joblib")
+            os.close(handle)
+            try:
+                joblib.dump(model, tmp_path)
+                os.chmod(tmp_path, 0o644)   # mkstemp makes it private to this user
+                os.replace(tmp_path, entry)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._count("compiles")
+            return model
+
+        self._count("hits")
+        return joblib.load(entry, mmap_mode="c")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = sorted(name for name in os.listdir(self.cache_dir) if not name.startswith(".")) if self.enabled else []
+            return {**self._counters, "enabled": self.enabled, "format": CACHE_FORMAT, "entries": entries}
+
+    def _entry_path(self, kind: str, source_path: str) -> str:
+        return os.path.join(self.cache_dir, f"{kind}-{file_digest(source_path)[:32]}-v{CACHE_FORMAT}")
+
+    def _write_arrays(self, entry: str, metadata: Dict, arrays: Dict[str, np.ndarray]) -> None:
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            files = {}
+            for i, (name, array) in enumerate(arrays.items()):
+                files[name] = f"{i}.npy"
+                np.save(os.path.join(tmp_dir, files[name]), np.ascontiguousarray(array), allow_pickle=False)
+            with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump({"format": CACHE_FORMAT, "metadata": metadata, "arrays": files}, f)
+            os.chmod(tmp_dir, 0o755)   # mkdtemp makes it private to this user
+            try:
+                os.rename(tmp_dir, entry)
+            except OSError:
+                # another process wrote the same entry first; both are identical
+                if not os.path.isdir(entry):
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _compiled(self, compile: Callable[[], Any]) -> Any:
+        try:
+            return compile()
+        except Exception:
+            self._count("failures")
+            raise
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+
+model_cache = ModelCache(cache_dir=settings.model_cache_dir)
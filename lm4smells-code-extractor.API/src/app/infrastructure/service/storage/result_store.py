@@ -0,0 +1,330 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Sequence as SequenceABC
+from dataclasses import asdict, replace
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from domain.entities.dl_classification import DLClassification
+from domain.entities.ml_classification import MLClassification
+from domain.entities.smell_occurrence import SmellOccurrence
+from domain.value_objects.location import Location
+from domain.value_objects.metrics import Metrics
+from infrastructure.config.settings import settings
+
+
+def _smell_from_dict(row: Dict) -> SmellOccurrence:
+    return SmellOccurrence(**{**row, "location": Location(**row["location"]), "metrics": Metrics(**row["metrics"])})
+
+
+def _relabel_smell(smell: SmellOccurrence, task_id: str, file_name: str) -> SmellOccurrence:
+    return replace(smell, id=task_id, location=replace(smell.location, file_name=file_name))
+
+
+def _relabel_classification(classification, task_id: str, file_name: str):
+    return replace(classification, id=task_id, file_name=file_name)
+
+
+# per approach: how a stored row is rebuilt, re-labelled for a new task and told apart by file
+_ROW_TYPES: Dict[str, Tuple[Callable[[Dict], object], Callable, Callable[[object], str]]] = {
+    "ast": (_smell_from_dict, _relabel_smell, lambda smell: smell.location.file_name),
+    "ml": (lambda row: MLClassification(**row), _relabel_classification, lambda row: row.file_name),
+    "dl": (lambda row: DLClassification(**row), _relabel_classification, lambda row: row.file_name),
+}
+
+
+def file_fingerprint(path: Optional[str]) -> str:
+    """Name, size and modification time of a model file, so replacing it changes the version."""
+    if not path:
+        return "none"
+    for candidate in (path, f"{path}.pkl"):   # pycaret paths are given without their extension
+        try:
+            stat = os.stat(candidate)
+        except OSError:
+            continue
+        return f"{os.path.basename(candidate)}-{stat.st_size}-{stat.st_mtime_ns}"
+    return os.path.basename(path)
+
+
+
+class Selection(SequenceABC):
+    """The items of ``items`` at ``indexes``, read only when asked for (session files stay lazy)."""
+
+    def __init__(self, items: Sequence, indexes: List[int]):
+        self._items = items
+        self._indexes = indexes
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._items[i] for i in self._indexes[index]]
+        return self._items[self._indexes[index]]
+
+class ResultStore:
+    """Results of earlier tasks, per file content, to copy into new tasks.
+
+    An entry holds the rows one approach produced for one file, keyed by a
+    hash of the file content, the approach, the analysis scope (smell type,
+    extraction type, model) and the version of the detector or model. When a
+    task meets content it already analysed, the stored rows are re-labelled
+    with the new task id and file name instead of being computed again.
+
+    A scope seen with a new version drops the entries of its older
+    versions, so bumping a detector or replacing a model file invalidates
+    its results; :meth:`invalidate` clears them explicitly. Like the metric
+    cache, a bounded in-memory LRU sits in front of an optional sqlite file,
+    itself bounded to ``max_disk_size`` entries, least recently used first.
+    """
+
+    def __init__(self, max_size: int = 10000, cache_dir: Optional[str] = None, enabled: bool = True, max_disk_size: int = 200000):
+        self.max_size = max_size
+        self.max_disk_size = max_disk_size
+        self.enabled = enabled
+
+        # key -> (approach, scope, version, payload)
+        self._memory: "OrderedDict[str, Tuple[str, str, str, str]]" = OrderedDict()
+        self._versions: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "disk_evictions": 0, "invalidated": 0}
+
+        self._disk: Optional[sqlite3.Connection] = None
+        self._disk_size = 0
+        if cache_dir and enabled:
+            self._open_disk(cache_dir)
+
+    def key_for(self, content_digest: str, approach: str, scope: str, version: str) -> str:
+        """Key of the rows of a file whose content has the SHA-256 ``content_digest``."""
+        return hashlib.sha256(f"{approach}\0{scope}\0{version}\0{content_digest}".encode("utf-8")).hexdigest()
+
+    def partition(
+        self,
+        task_id: str,
+        approach: str,
+        scope: str,
+        version: str,
+        file_contents: Sequence[str],
+        file_names: Sequence[str],
+    ) -> Tuple[Dict[int, List], List[int], Dict[str, str]]:
+        """Split an upload into the rows already known and the files still to analyse.
+
+        Returns the reused rows (re-labelled for ``task_id``) by file index,
+        the indexes of the files to analyse and the key to :meth:`remember`
+        each of them by. A name uploaded twice is analysed and never stored,
+        as its rows could not be told apart.
+        """
+        if not self.enabled:
+            return {}, list(range(len(file_names))), {}
+
+        self._check_version(approach, scope, version)
+        repeated = {name for name, count in Counter(file_names).items() if count > 1}
+        # session files carry the digest of their manifest; only plain uploads are hashed here
+        digests = getattr(file_contents, "digests", None)
+
+        reused: Dict[int, List] = {}
+        missing: List[int] = []
+        keys: Dict[str, str] = {}
+        for i, file_name in enumerate(file_names):
+            if file_name in repeated:
+                missing.append(i)
+                continue
+            digest = digests[i] if digests is not None else hashlib.sha256(file_contents[i].encode("utf-8")).hexdigest()
+            key = self.key_for(digest, approach, scope, version)
+            rows = self.get(key, approach, task_id, file_name)
+            if rows is None:
+                missing.append(i)
+                keys[file_name] = key
+            else:
+                reused[i] = rows
+        return reused, missing, keys
+
+    def remember(self, approach: str, scope: str, version: str, keys: Dict[str, str], rows: Sequence) -> None:
+        """Store the freshly computed ``rows`` under the key of the file each belongs to.
+
+        Files of ``keys`` without any row are stored too, as an empty result.
+        """
+        if not self.enabled or not keys:
+            return
+
+        file_name_of = _ROW_TYPES[approach][2]
+        rows_by_file: Dict[str, List] = {file_name: [] for file_name in keys}
+        for row in rows:
+            file_rows = rows_by_file.get(file_name_of(row))
+            if file_rows is not None:
+                file_rows.append(row)
+
+        for file_name, file_rows in rows_by_file.items():
+            self.put(keys[file_name], approach, scope, version, file_rows)
+
+    @staticmethod
+    def in_file_order(approach: str, file_names: Sequence[str], reused: Dict[int, List], rows: Sequence) -> List:
+        """Reused and freshly computed rows together, file by file in upload order."""
+        file_name_of = _ROW_TYPES[approach][2]
+        fresh: Dict[str, List] = {}
+        for row in rows:
+            fresh.setdefault(file_name_of(row), []).append(row)
+
+        ordered: List = []
+        for i, file_name in enumerate(file_names):
+            ordered.extend(reused[i] if i in reused else fresh.pop(file_name, []))
+        return ordered
+
+    def get(self, key: str, approach: str, task_id: str, file_name: str) -> Optional[List]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._counters["hits"] += 1
+            else:
+                entry = self._disk_get(key)
+                if entry is None:
+                    self._counters["misses"] += 1
+                    return None
+                self._counters["disk_hits"] += 1
+                self._memory_put(key, entry)
+
+        from_dict, relabel, _ = _ROW_TYPES[approach]
+        return [relabel(from_dict(row), task_id, file_name) for row in json.loads(entry[3])]
+
+    def put(self, key: str, approach: str, scope: str, version: str, rows: Sequence) -> None:
+        entry = (approach, scope, version, json.dumps([asdict(row) for row in rows], default=str))
+        with self._lock:
+            self._memory_put(key, entry)
+            self._disk_put(key, entry)
+            self._counters["stores"] += 1
+
+    def invalidate(self, approach: Optional[str] = None) -> int:
+        """Drop every stored result, or those of one approach; returns how many went."""
+        with self._lock:
+            keys = [key for key, entry in self._memory.items() if approach is None or entry[0] == approach]
+            for key in keys:
+                del self._memory[key]
+            # the sqlite file holds every entry of the memory tier, and the evicted ones
+            removed = self._disk_delete("approach = ?" if approach else "1 = 1", (approach,) if approach else ())
+            if removed is None:
+                removed = len(keys)
+
+            self._versions = {scope: version for scope, version in self._versions.items() if approach and scope[0] != approach}
+            self._counters["invalidated"] += removed
+            return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = self._counters["hits"] + self._counters["disk_hits"]
+            return {
+                **self._counters,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "enabled": self.enabled,
+                "size": len(self._memory),
+                "max_size": self.max_size,
+                "disk_enabled": self._disk is not None,
+                "disk_size": self._disk_size,
+                "max_disk_size": self.max_disk_size,
+                "versions": {f"{approach}:{scope}": version for (approach, scope), version in self._versions.items()},
+            }
+
+    def _check_version(self, approach: str, scope: str, version: str) -> None:
+        """Drop the entries of ``scope`` stored under another version, once per version change."""
+        with self._lock:
+            if self._versions.get((approach, scope)) == version:
+                return
+            self._versions[(approach, scope)] = version
+
+            stale = [key for key, entry in self._memory.items() if entry[:2] == (approach, scope) and entry[2] != version]
+            for key in stale:
+                del self._memory[key]
+            removed = self._disk_delete("approach = ? AND scope = ? AND version != ?", (approach, scope, version))
+            if removed is None:
+                removed = len(stale)
+
+            if removed:
+                print(f"[INFO] Dropped {removed} stored {approach} results of {scope}: version is now {version}")
+                self._counters["invalidated"] += removed
+
+    def _memory_put(self, key: str, entry: Tuple[str, str, str, str]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _open_disk(self, cache_dir: str) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        self._disk = sqlite3.connect(
+            os.path.join(cache_dir, "result_store.sqlite3"),
+            timeout=30,
+            check_same_thread=False,
+        )
+        self._disk.execute(
+            "CREATE TABLE IF NOT EXISTS result_store ("
+            "key TEXT PRIMARY KEY, approach TEXT NOT NULL, scope TEXT NOT NULL, version TEXT NOT NULL, "
+            "rows TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._disk.execute("CREATE INDEX IF NOT EXISTS result_store_scope ON result_store (approach, scope)")
+        self._disk.execute("CREATE INDEX IF NOT EXISTS result_store_stored_at ON result_store (stored_at)")
+        self._disk.commit()
+        self._disk_size = self._disk.execute("SELECT COUNT(*) FROM result_store").fetchone()[0]
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, str, str, str]]:
+        if self._disk is None:
+            return None
+        try:
+            row = self._disk.execute("SELECT approach, scope, version, rows FROM result_store WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            # stored_at doubles as the last access, which eviction goes by
+            self._disk.execute("UPDATE result_store SET stored_at = ? WHERE key = ?", (time.time(), key))
+            self._disk.commit()
+            return row
+        except sqlite3.Error as e:
+            print(f"[WARN] Result store disk read failed: {e}")
+            return None
+
+    def _disk_put(self, key: str, entry: Tuple[str, str, str, str]) -> None:
+        if self._disk is None:
+            return
+        try:
+            known = self._disk.execute("SELECT 1 FROM result_store WHERE key = ?", (key,)).fetchone() is not None
+            self._disk.execute(
+                "INSERT OR REPLACE INTO result_store (key, approach, scope, version, rows, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, *entry, time.time()),
+            )
+            if not known:
+                self._disk_size += 1
+            if self._disk_size > self.max_disk_size:
+                overflow = self._disk_size - self.max_disk_size
+                self._disk.execute(
+                    "DELETE FROM result_store WHERE key IN (SELECT key FROM result_store ORDER BY stored_at LIMIT ?)",
+                    (overflow,),
+                )
+                self._disk_size -= overflow
+                self._counters["disk_evictions"] += overflow
+            self._disk.commit()
+        except sqlite3.Error as e:
+            print(f"[WARN] Result store disk write failed: {e}")
+
+    def _disk_delete(self, condition: str, params: Tuple) -> Optional[int]:
+        if self._disk is None:
+            return None
+        try:
+            removed = self._disk.execute(f"DELETE FROM result_store WHERE {condition}", params).rowcount
+            self._disk.commit()
+            self._disk_size -= removed
+            return removed
+        except sqlite3.Error as e:
+            print(f"[WARN] Result store disk invalidation failed: {e}")
+            return None
+
+
+result_store = ResultStore(
+    max_size=settings.result_store_size,
+    cache_dir=settings.result_store_dir,
+    enabled=settings.result_store_enabled,
+    max_disk_size=settings.result_store_disk_size,
+)
@@ -0,0 +1,377 @@
+import codecs
+import hashlib
+import json
+import os
+import re
+import tarfile
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+import zipfile
+from collections.abc import Sequence
+from typing import IO, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from infrastructure.config.settings import settings
+
+_CHUNK_SIZE = 1 << 20
+
+# folders that never hold the code under analysis
+DEFAULT_EXCLUDES = ["**/.git/**", "**/__pycache__/**", "**/.venv/**", "**/venv/**", "**/site-packages/**"]
+
+
+class UploadSessionNotFoundError(KeyError):
+    pass
+
+
+class SessionFiles(Sequence):
+    """Decoded contents of a session, read from the blob store one file at a time.
+
+    Indexing reads a single blob and slicing a list of them, so a pipeline
+    walking the files holds at most the ones it is working on. The blobs
+    are pinned for as long as the object is alive, so deleting or expiring
+    the session does not remove them under a queued or running task.
+    """
+
+    def __init__(self, store: "UploadStore", digests: List[str]):
+        self._store = store
+        self._digests = digests
+        weakref.finalize(self, store._unpin, store._pin(digests))
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    @property
+    def digests(self) -> List[str]:
+        """SHA-256 of each file, as recorded in the session manifest."""
+        return list(self._digests)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._store.read_blob(digest) for digest in self._digests[index]]
+        return self._store.read_blob(self._digests[index])
+
+
+class UploadStore:
+    """Local content-addressed store for uploaded source files.
+
+    File bodies are kept once per SHA-256 under ``blobs/``, whatever the
+    session or name they were uploaded with. A session is a small JSON
+    manifest under ``sessions/`` listing file names and blob hashes, so an
+    upload can be analysed by every approach without sending it again.
+    Sessions expire after ``session_ttl`` seconds; blobs no longer listed by
+    any session are removed with them.
+    """
+
+    def __init__(self, root_dir: str, session_ttl: int = 86400):
+        self.root_dir = root_dir
+        self.session_ttl = session_ttl
+        self._blobs_dir = os.path.join(root_dir, "blobs")
+        self._sessions_dir = os.path.join(root_dir, "sessions")
+        # re-entrant: a dropped SessionFiles may unpin from a garbage collection run while the lock is held
+        self._lock = threading.RLock()
+        # blobs of sessions still being written or read by a task, kept away from garbage collection
+        self._pending: List[Set[str]] = []
+
+    def create_session(self, files: List[Tuple[str, bytes]]) -> Dict:
+        """Store ``(file_name, content)`` pairs and return the new session manifest."""
+        for file_name, content in files:
+            try:
+                content.decode("utf-8")
+            except UnicodeDecodeError:
+                raise ValueError(f"File {file_name} is not valid UTF-8")
+
+        return self._create_session((file_name, [content]) for file_name, content in files)
+
+    def create_session_from_stream(self, files: Iterable[Tuple[str, Iterable[bytes]]], source: Optional[Dict] = None) -> Dict:
+        """Store ``(file_name, chunks)`` pairs as they come; files that are not UTF-8 are skipped and listed.
+
+        ``source`` is kept in the manifest to describe where the files came from.
+        """
+        skipped: List[str] = []
+        manifest = self._create_session(files, skipped, source)
+        return {**manifest, "skipped": skipped}
+
+    def create_session_from_archive(
+        self,
+        archive_path: str,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+    ) -> Dict:
+        """Store the ``.py`` members of a zip or tar (optionally compressed) archive as a session.
+
+        Members are streamed into the blob store one at a time, so memory
+        does not grow with the archive. A member is kept when it matches
+        one of the ``include`` globs and none of the ``exclude`` ones;
+        files that are not valid UTF-8 are skipped and listed in the result.
+        """
+        matches = path_filter(include, exclude)
+        members = ((name, _iter_chunks(stream)) for name, stream in _iter_archive(archive_path) if matches(name))
+        manifest = self.create_session_from_stream(members)
+        if not manifest["files"]:
+            self.delete_session(manifest["session_id"])
+            raise ValueError("The archive has no Python files matching the given globs")
+        return manifest
+
+    def get_session(self, session_id: str) -> Dict:
+        path = self._session_path(session_id)
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise UploadSessionNotFoundError(session_id)
+
+        if manifest["expires_at"] < time.time():
+            raise UploadSessionNotFoundError(session_id)
+        return manifest
+
+    def load_files(self, session_id: str) -> Tuple[SessionFiles, List[str]]:
+        """Lazily decoded contents and file names of a session, in upload order."""
+        # read and pinned under the lock, so a concurrent delete cannot collect the blobs in between
+        with self._lock:
+            manifest = self.get_session(session_id)
+            files = SessionFiles(self, [entry["sha256"] for entry in manifest["files"]])
+        return files, [entry["file_name"] for entry in manifest["files"]]
+
+    def read_blob(self, digest: str) -> str:
+        with open(self._blob_path(digest), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def delete_session(self, session_id: str) -> None:
+        self.get_session(session_id)
+        with self._lock:
+            os.remove(self._session_path(session_id))
+            self._collect_garbage()
+
+    def purge_expired(self) -> int:
+        """Drop expired sessions and the blobs only they referenced; returns how many sessions went."""
+        if not os.path.isdir(self._sessions_dir):
+            return 0
+
+        removed = 0
+        with self._lock:
+            now = time.time()
+            for name in os.listdir(self._sessions_dir):
+                path = os.path.join(self._sessions_dir, name)
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        expired = json.load(f)["expires_at"] < now
+                except (OSError, ValueError, KeyError):
+                    continue
+                if expired:
+                    os.remove(path)
+                    removed += 1
+            if removed:
+                self._collect_garbage()
+        return removed
+
+    def _create_session(
+        self,
+        files: Iterable[Tuple[str, Iterable[bytes]]],
+        skipped: Optional[List[str]] = None,
+        source: Optional[Dict] = None,
+    ) -> Dict:
+        self.purge_expired()
+
+        entries = []
+        deduplicated = 0
+        with self._lock:
+            self._ensure_dirs()
+            pending = self._pin(())
+        try:
+            for file_name, chunks in files:
+                try:
+                    digest, size, written = self._write_blob(chunks, pending)
+                except UnicodeDecodeError:
+                    if skipped is None:
+                        raise ValueError(f"File {file_name} is not valid UTF-8")
+                    print(f"[WARN] Skipping {file_name}: not valid UTF-8")
+                    skipped.append(file_name)
+                    continue
+                if not written:
+                    deduplicated += 1
+                entries.append({"file_name": file_name, "sha256": digest, "size": size})
+
+            manifest = {
+                "session_id": str(uuid.uuid4()),
+                "created_at": time.time(),
+                "expires_at": time.time() + self.session_ttl,
+                "files": entries,
+            }
+            if source is not None:
+                manifest["source"] = source
+            self._atomic_write(self._session_path(manifest["session_id"]), [json.dumps(manifest).encode("utf-8")])
+        finally:
+            self._unpin(pending)
+
+        return {**manifest, "deduplicated": deduplicated}
+
+    def _pin(self, digests: Iterable[str]) -> Set[str]:
+        """Keep ``digests`` away from garbage collection until :meth:`_unpin`; called with the lock held."""
+        pinned = set(digests)
+        self._pending.append(pinned)
+        return pinned
+
+    def _unpin(self, pinned: Set[str]) -> None:
+        with self._lock:
+            # by identity: two pins of the same blobs are equal sets
+            self._pending = [other for other in self._pending if other is not pinned]
+
+    def _collect_garbage(self) -> None:
+        referenced = set().union(*self._pending)
+        for name in os.listdir(self._sessions_dir):
+            try:
+                with open(os.path.join(self._sessions_dir, name), encoding="utf-8") as f:
+                    referenced.update(entry["sha256"] for entry in json.load(f)["files"])
+            except (OSError, ValueError, KeyError):
+                continue
+
+        for prefix in os.listdir(self._blobs_dir):
+            prefix_dir = os.path.join(self._blobs_dir, prefix)
+            for digest in os.listdir(prefix_dir):
+                if digest not in referenced:
+                    os.remove(os.path.join(prefix_dir, digest))
+            if not os.listdir(prefix_dir):
+                os.rmdir(prefix_dir)
+
+    def _write_blob(self, chunks: Iterable[bytes], pending: Set[str]) -> Tuple[str, int, bool]:
+        """Stream a body into the store, hashing and validating it on the way.
+
+        Returns its digest, its size and whether it was new. Raises
+        ``UnicodeDecodeError`` (and stores nothing) when it is not UTF-8.
+        """
+        digest = hashlib.sha256()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=self._blobs_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    decoder.decode(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+                decoder.decode(b"", final=True)
+
+            hexdigest = digest.hexdigest()
+            path = self._blob_path(hexdigest)
+            with self._lock:
+                pending.add(hexdigest)
+                if os.path.exists(path):
+                    os.unlink(tmp_path)
+                    return hexdigest, size, False
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                return hexdigest, size, True
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _atomic_write(self, path: str, chunks: Iterable[bytes]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def _ensure_dirs(self) -> None:
+        os.makedirs(self._blobs_dir, exist_ok=True)
+        os.makedirs(self._sessions_dir, exist_ok=True)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._blobs_dir, digest[:2], digest)
+
+    def _session_path(self, session_id: str) -> str:
+        # the id ends up in a path, so only canonical UUIDs are accepted
+        try:
+            canonical = str(uuid.UUID(session_id))
+        except (ValueError, TypeError, AttributeError):
+            raise UploadSessionNotFoundError(session_id)
+        if canonical != session_id:
+            raise UploadSessionNotFoundError(session_id)
+        return os.path.join(self._sessions_dir, f"{session_id}.json")
+
+
+def _iter_archive(archive_path: str) -> Iterator[Tuple[str, IO[bytes]]]:
+    """Regular files of a zip or tar archive as ``(posix name, stream)``, in archive order."""
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    with archive.open(info) as stream:
+                        yield _normalize_member_name(info.filename), stream
+        return
+
+    try:
+        archive = tarfile.open(archive_path, "r:*")
+    except tarfile.TarError:
+        raise ValueError("Unsupported archive: send a .zip, .tar, .tar.gz, .tar.bz2 or .tar.xz file")
+    with archive:
+        for member in archive:
+            if member.isfile():
+                stream = archive.extractfile(member)
+                with stream:
+                    yield _normalize_member_name(member.name), stream
+
+
+def _iter_chunks(stream: BinaryIO) -> Iterator[bytes]:
+    while True:
+        chunk = stream.read(_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _normalize_member_name(name: str) -> str:
+    name = name.replace("\\", "/")
+    while name.startswith("./"):
+        name = name[2:]
+    return name.lstrip("/")
+
+
+def path_filter(include: Optional[List[str]] = None, exclude: Optional[List[str]] = None):
+    """Predicate keeping the ``.py`` paths matched by ``include`` (default: all) and not by ``exclude``."""
+    included = [_glob_regex(pattern) for pattern in include or ["**"]]
+    excluded = [_glob_regex(pattern) for pattern in (DEFAULT_EXCLUDES if exclude is None else exclude)]
+
+    def matches(name: str) -> bool:
+        return (
+            name.endswith(".py")
+            and any(regex.fullmatch(name) for regex in included)
+            and not any(regex.fullmatch(name) for regex in excluded)
+        )
+
+    return matches
+
+
+def _glob_regex(pattern: str) -> "re.Pattern":
+    """Compile a path glob: ``**/`` spans any number of folders, ``*`` and ``?`` stay inside one."""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            regex.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            regex.append("[^/]")
+            i += 1
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(regex))
+
+
+upload_store = UploadStore(root_dir=settings.upload_store_dir, session_ttl=settings.upload_session_ttl)
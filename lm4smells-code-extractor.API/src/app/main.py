@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Optional
 import threading
-from fastapi import FastAPI, File, UploadFile, Form, Query
+from fastapi import FastAPI, File, UploadFile, Form, Query, HTTPException
 from application.usecase.message_operation_use_case import MessageOperationUseCase
 from application.usecase.ast_operation_use_case import ASTOperationUseCase
 from application.usecase.ml_operation_use_case import MLOperationUseCase
@@ -13,8 +13,10 @@ from application.usecase.schedule_status_operation_use_case import ScheduleStatu
 from application.dtos.request.message_operation_input import MessageOperationInput
 from application.dtos.request.ast_operation_input import ASTOperationInput
 from application.dtos.request.user_operation_input import UserOperationInput
+from application.dtos.request.uploaded_files import store_archive, store_git_changes
 from application.dtos.enums.lm_models import LMModels
 from application.dtos.enums.analyse_type import AnalyseType
+from application.dtos.enums.ast_analyse_type import ASTAnalyseType
 from application.dtos.enums.extract_type import ExtractType
 from application.dtos.enums.prompt_type import PromptType
 from application.dtos.enums.smell_definition import SmellDefinition
@@ -27,6 +29,15 @@ from uuid import uuid4
 from application.usecase.handle_ml_codes_use_case import HandleMlCodesUseCase
 from application.usecase.handle_dl_codes_use_case import HandleDlCodesUseCase
 from infrastructure.service.schedule.task_manager import TaskManager
+from infrastructure.service.metric_codes.metric_cache import metric_cache
+from infrastructure.service.storage.upload_store import UploadSessionNotFoundError, upload_store
+from infrastructure.service.storage.result_store import result_store
+from infrastructure.modules.smells.ml.ml_classifier import MLClassifier
+from infrastructure.modules.smells.ml.model_registry import ml_model_registry
+from infrastructure.modules.smells.dl.model_server import dl_model_server
+from infrastructure.service.storage.model_cache import model_cache
+from infrastructure.service.schedule.inference_queue import dl_inference_queue, ml_inference_queue
+from infrastructure.config.settings import settings
 
 
 app = FastAPI()
@@ -41,6 +52,19 @@ app.add_middleware(
 task_manager = TaskManager()
 
 
+@app.on_event("startup")
+def preload_ml_models():
+    # warm the registry in the background, so the API answers while the models load
+    if settings.ml_model_preload:
+        threading.Thread(target=MLClassifier().preload, args=(settings.ml_model_preload,), daemon=True).start()
+
+
+@app.on_event("startup")
+def preload_dl_model():
+    if settings.dl_model_preload:
+        threading.Thread(target=dl_model_server.warm_up, daemon=True).start()
+
+
 @app.post("/api/schedule/lm", summary="Classify code using an LM-based approach", tags=["Schedule"])
 async def extract_code(is_composite_prompt: bool = Form(..., description="Indicate if you want to create a prompt composed of code + metrics."),
                        model: LMModels = Form(..., description="Indicate which LM model you would like to be processed."),
@@ -48,7 +72,8 @@ async def extract_code(is_composite_prompt: bool = Form(..., description="Indica
                        prompt_type: PromptType = Form(..., description="Indicate the prompt type to process the message."),
                        analyse_type: AnalyseType = Form(..., description="Indicates the type of code smell: 1 for large Class - 2 for long Method - 3 for long parameter list."), 
                        extract_type: ExtractType = Form(..., description="Indicate the type of extraction you want to perform: 1 for Class or 2 for Method."),
-                       files: List[UploadFile] = File(..., description="Specify the file you want to extract.")):
+                       files: Optional[List[UploadFile]] = File(None, description="Specify the file you want to extract. Leave empty when sending a session_id."),
+                       session_id: Optional[str] = Form(None, description="Handle returned by /api/uploads, to analyse stored files instead of sending them again.")):
  
     
     task_id = str(uuid4())
@@ -61,7 +86,8 @@ async def extract_code(is_composite_prompt: bool = Form(..., description="Indica
         prompt="",
         model=model,
         files=files,
-        task_id=task_id
+        task_id=task_id,
+        session_id=session_id
     )
 
     task_manager.schedule(
@@ -76,9 +102,11 @@ async def extract_code(is_composite_prompt: bool = Form(..., description="Indica
 @app.post("/api/schedule/ast", summary="Classify code using an AST-based approach", tags=["Schedule"])
 async def classify_code_with_ast(
     extract_type: ExtractType = Form(..., description="Indicate the type of extraction you want to perform: 1 for Class or 2 for Method."),
-    analyse_type: AnalyseType = Form(..., description="Indicates the type of code smell: 1 for large Class - 2 for long Method - 3 for long parameter list."),
+    analyse_type: List[ASTAnalyseType] = Form(..., description="Indicates the type of code smell. Repeat the field to run several detectors in one task, or use 'all' to run every detector."),
     #smell_definition: SmellDefinition = Form(..., description="Specify the code smell definition to be applied, based on the selected author."),
-    files: List[UploadFile] = File(..., description="Specify the file you want to extract.")
+    files: Optional[List[UploadFile]] = File(None, description="Specify the file you want to extract. Leave empty when sending a session_id."),
+    session_id: Optional[str] = Form(None, description="Handle returned by /api/uploads, to analyse stored files instead of sending them again."),
+    previous_task_id: Optional[str] = Form(None, description="Task whose results are copied for the files not sent again, e.g. the files left unchanged since an earlier run.")
     ):
 
     task_id = str(uuid4())
@@ -88,7 +116,9 @@ async def classify_code_with_ast(
         analyse_type=analyse_type,
         #smell_definition=smell_definition,
         files=files,
-        task_id=task_id
+        task_id=task_id,
+        session_id=session_id,
+        previous_task_id=previous_task_id
     )
 
     task_manager.schedule(
@@ -101,21 +131,30 @@ async def classify_code_with_ast(
 
 @app.post("/api/schedule/ml", summary="Classify code using a ML-based approach", tags=["Schedule"])
 async def classify_code_with_ml(
-    files: List[UploadFile] = File(..., description="Specify the file you want to extract."),
+    files: Optional[List[UploadFile]] = File(None, description="Specify the file you want to extract. Leave empty when sending a session_id."),
+    session_id: Optional[str] = Form(None, description="Handle returned by /api/uploads, to analyse stored files instead of sending them again."),
+    previous_task_id: Optional[str] = Form(None, description="Task whose results are copied for the files not sent again, e.g. the files left unchanged since an earlier run."),
     extract_type: ExtractType = Form(..., description="Indicate the type of extraction you want to perform: 1 for Class or 2 for Method."),
     analyse_type: AnalyseType = Form(..., description="Indicates the type of code smell: 1 for large Class - 2 for long Method - 3 for long parameter list."),
-    ml_model: MLModel = Form(..., description="Indicate which ML model you would like to be processed.")
+    ml_model: List[MLModel] = Form(..., description="Indicate which ML model you would like to be processed. Repeat the field to score with several models in one task, or use 'all' for every model supported for the analyse type."),
+    ensemble: bool = Form(False, description="With several models, also store a majority-vote classification per element (model ML_ENSEMBLE), ties broken by mean confidence.")
     ):
 
     task_id = str(uuid4())
 
-    input = await MLOperationInput.process_files(
-        files=files,
-        extract_type=extract_type,
-        analyse_type=analyse_type,
-        ml_model=ml_model,
-        task_id=task_id
-    )
+    try:
+        input = await MLOperationInput.process_files(
+            files=files,
+            extract_type=extract_type,
+            analyse_type=analyse_type,
+            ml_model=ml_model,
+            task_id=task_id,
+            session_id=session_id,
+            previous_task_id=previous_task_id,
+            ensemble=ensemble
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     task_manager.schedule(
         task_id=task_id,
@@ -127,7 +166,9 @@ async def classify_code_with_ml(
 
 @app.post("/api/schedule/dl", summary="Classify code using a DL-based approach", tags=["Schedule"])
 async def classify_code_with_dl(
-    files: List[UploadFile] = File(..., description="Specify the file you want to extract."),
+    files: Optional[List[UploadFile]] = File(None, description="Specify the file you want to extract. Leave empty when sending a session_id."),
+    session_id: Optional[str] = Form(None, description="Handle returned by /api/uploads, to analyse stored files instead of sending them again."),
+    previous_task_id: Optional[str] = Form(None, description="Task whose results are copied for the files not sent again, e.g. the files left unchanged since an earlier run."),
     extract_type: ExtractType = Form(..., description="Indicate the type of extraction you want to perform: 1 for Class or 2 for Method."),
     analyse_type: AnalyseType = Form(..., description="Indicates the type of code smell: 1 for large Class - 2 for long Method - 3 for long parameter list."),
     dl_model: DLModel = Form(..., description="Indicate which DL model you would like to be processed.")
@@ -140,7 +181,9 @@ async def classify_code_with_dl(
         extract_type=extract_type,
         analyse_type=analyse_type,
         dl_model=dl_model,
-        task_id=task_id
+        task_id=task_id,
+        session_id=session_id,
+        previous_task_id=previous_task_id
     )
 
     task_manager.schedule(
@@ -152,6 +195,51 @@ async def classify_code_with_dl(
     return {"status": "Scheduled", "task_id": task_id, "approach": "dl"}
 
 
+@app.post("/api/uploads", summary="Store files once and get a session to schedule analyses against", tags=["Uploads"])
+async def upload_files(files: List[UploadFile] = File(..., description="Specify the files you want to analyse.")):
+    try:
+        return upload_store.create_session([(file.filename, await file.read()) for file in files])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/uploads/archive", summary="Store the Python files of a zip or tar.gz repository archive as a session", tags=["Uploads"])
+async def upload_archive(
+    archive: UploadFile = File(..., description="A .zip, .tar, .tar.gz, .tar.bz2 or .tar.xz archive of the repository."),
+    include: Optional[List[str]] = Form(None, description="Globs of the paths to analyse (default: every .py file). '**/' spans folders."),
+    exclude: Optional[List[str]] = Form(None, description="Globs of the paths to leave out (default: .git, __pycache__, virtualenvs and site-packages)."),
+):
+    return await store_archive(archive, include, exclude)
+
+
+@app.post("/api/uploads/git", summary="Store the Python files changed between two revisions of a local git repository as a session", tags=["Uploads"])
+async def upload_git_changes(
+    repo_path: str = Form(..., description="Path of the repository, relative to the configured git_repository_root."),
+    base_revision: Optional[str] = Form(None, description="Revision already analysed. Leave empty to store every Python file of the head revision."),
+    head_revision: str = Form("HEAD", description="Revision to analyse."),
+    include: Optional[List[str]] = Form(None, description="Globs of the paths to analyse (default: every .py file). '**/' spans folders."),
+    exclude: Optional[List[str]] = Form(None, description="Globs of the paths to leave out (default: .git, __pycache__, virtualenvs and site-packages)."),
+):
+    return await store_git_changes(repo_path, base_revision, head_revision, include, exclude)
+
+
+@app.get("/api/uploads/{session_id}", summary="Get the files of an upload session", tags=["Uploads"])
+async def get_upload_session(session_id: str):
+    try:
+        return upload_store.get_session(session_id)
+    except UploadSessionNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Upload session {session_id} not found or expired.")
+
+
+@app.delete("/api/uploads/{session_id}", summary="Delete an upload session", tags=["Uploads"])
+async def delete_upload_session(session_id: str):
+    try:
+        upload_store.delete_session(session_id)
+    except UploadSessionNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Upload session {session_id} not found or expired.")
+    return {"status": "Deleted", "session_id": session_id}
+
+
 @app.get("/api/schedule/status", summary="Check the status of a scheduled AST classification task", tags=["Schedule"])
 async def get_classification_status(task_id: List[str] = Query(..., description="The ID of the task to check")):
     return ScheduleStatusOperationUseCase().execute(task_id=task_id)
@@ -188,6 +276,43 @@ async def get_dl_code_smells(task_id: str = Query(..., description="ID to retrie
     )
 
 
+@app.get("/api/monitoring/metric-cache", summary="Get hit/miss counters of the metric cache", tags=["Monitoring"])
+async def get_metric_cache_stats():
+    return metric_cache.stats()
+
+
+@app.get("/api/monitoring/ml-models", summary="Get the loaded ML models, their load times and the registry hit rate", tags=["Monitoring"])
+async def get_ml_model_stats():
+    return ml_model_registry.stats()
+
+
+@app.get("/api/monitoring/dl-model", summary="Get the readiness of the DL model server and its prediction counters", tags=["Monitoring"])
+async def get_dl_model_status():
+    return dl_model_server.status()
+
+
+@app.get("/api/monitoring/model-cache", summary="Get the compiled model cache entries and its hit/compile counters", tags=["Monitoring"])
+async def get_model_cache_stats():
+    return model_cache.stats()
+
+
+@app.get("/api/monitoring/inference-queue", summary="Get the batch size and wait time histograms of the shared ML/DL inference queues", tags=["Monitoring"])
+async def get_inference_queue_stats():
+    return {"ml": ml_inference_queue.stats(), "dl": dl_inference_queue.stats()}
+
+
+@app.get("/api/monitoring/result-store", summary="Get hit/miss counters of the results reused across tasks", tags=["Monitoring"])
+async def get_result_store_stats():
+    return result_store.stats()
+
+
+@app.delete("/api/monitoring/result-store", summary="Invalidate the results reused across tasks", tags=["Monitoring"])
+async def invalidate_result_store(approach: Optional[Approach] = Query(None, description="Only drop the results of this approach.")):
+    if approach == Approach.LM:
+        raise HTTPException(status_code=400, detail="LM results are not reused across tasks.")
+    removed = result_store.invalidate(approach.value if approach else None)
+    return {"status": "Invalidated", "removed": removed}
+
 
 # if __name__ == "__main__":
 #     import uvicorn
@@ -0,0 +1,12 @@
+"""Load the settings of ``docker.env`` for the variables not already set, so the app modules import."""
+import os
+
+_DOCKER_ENV = os.path.join(os.path.dirname(__file__), *[os.pardir] * 4, "docker.env")
+
+if os.path.exists(_DOCKER_ENV):
+    with open(_DOCKER_ENV, encoding="utf-8") as env_file:
+        for line in env_file:
+            line = line.strip()
+            if line and not line.startswith("#") and "=" in line:
+                name, value = line.split("=", 1)
+                os.environ.setdefault(name, value)
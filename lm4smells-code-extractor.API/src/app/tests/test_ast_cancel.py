@@ -0,0 +1,80 @@
+"""A cancelled AST task must not store results for the files it never analysed.
+
+Run from the ``app`` folder:
+
+    python -m pytest tests
+"""
+import threading
+
+import pytest
+
+import application.usecase.ast_operation_use_case as ast_use_case
+from application.dtos.enums.analyse_type import AnalyseType
+from application.dtos.enums.approach import Approach
+from application.dtos.request.ast_operation_input import ASTOperationInput
+from application.usecase.ast_operation_use_case import ASTOperationUseCase
+from infrastructure.modules.smells.ast.smell_pool import SmellPool
+from infrastructure.modules.smells.ast.smells import Smells
+from infrastructure.service.schedule.enums.task_status import TaskStatus
+from infrastructure.service.storage.result_store import ResultStore
+
+
+class _CancelAfterChecks(threading.Event):
+    """Set once it has been checked ``checks`` times, i.e. in the middle of the run."""
+
+    def __init__(self, checks: int):
+        super().__init__()
+        self._checks = checks
+
+    def is_set(self) -> bool:
+        self._checks -= 1
+        if self._checks < 0:
+            self.set()
+        return super().is_set()
+
+
+class _ScheduleRepository:
+    def __init__(self):
+        self.statuses = []
+
+    def save_schedule_status(self, task_id, status, approach):
+        self.statuses.append(status)
+
+
+class _SmellRepository:
+    def __init__(self):
+        self.saved = []
+
+    def save_all(self, smell):
+        self.saved.append(smell)
+
+
+@pytest.fixture
+def pool():
+    pool = SmellPool(workers=2, chunk_size=1, min_files=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_cancelled_fan_out_stores_nothing(monkeypatch, pool):
+    store = ResultStore()
+    monkeypatch.setattr(ast_use_case, "result_store", store)
+    monkeypatch.setattr(ast_use_case, "smell_pool", pool)
+
+    file_names = [f"module_{i}.py" for i in range(4)]
+    file_contents = [f"def f{i}(a, b, c, d, e, f, g):\n    return {i}\n" for i in range(4)]
+    input = ASTOperationInput(file_contents, file_names, None, AnalyseType.long_parameter_list, "task")
+
+    use_case = ASTOperationUseCase.__new__(ASTOperationUseCase)
+    use_case.repository = _SmellRepository()
+    use_case.schedule_repository = _ScheduleRepository()
+
+    # the first chunk is collected, then the task is cancelled and the other three are dropped
+    use_case.ast_based_code_classification_use_case(input, _CancelAfterChecks(1))
+
+    assert use_case.schedule_repository.statuses[-1] == TaskStatus.CANCELED.value
+    assert use_case.repository.saved == []
+    scope = AnalyseType.long_parameter_list.value
+    reused, missing, _ = store.partition("next", Approach.AST.value, scope, Smells.VERSION, file_contents, file_names)
+    assert reused == {}
+    assert missing == [0, 1, 2, 3]